@@ -0,0 +1,52 @@
+'''
+Per-call overhead of binding the JSON arguments of a request to a registered Python function.
+
+Run with `python benchmarks/bench_call_plan.py` from the repository root.
+'''
+import os
+import sys
+import timeit
+from inspect import signature
+from typing import Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jianmu.call_plan import CallPlan  # noqa: E402
+from jianmu.log import logger  # noqa: E402
+
+NUMBER = 200000
+
+stdout = open(os.devnull, mode='w', encoding='utf8', buffering=1)
+
+
+def add(a: int, b: int, c: int = 0) -> int:
+    return a + b + c
+
+
+def call_before(json: List[Any]) -> Any:
+    stdout.write(f'Function {add.__name__} is called.\n')
+    param_num = len(signature(add).parameters)
+    args: List[Any] = json
+    args_num = len(args)
+    if param_num != args_num:
+        args = [args[i] if i < args_num else None for i in range(param_num)]
+    return add(*args)
+
+
+plan = CallPlan(add)
+
+
+def call_after(json: List[Any]) -> Any:
+    logger.debug('Function %s is called.', plan.name)
+    args, kwargs = plan.bind(json)
+    return add(*args, **kwargs)
+
+
+def main() -> None:
+    for label, fn in (('before', call_before), ('after', call_after)):
+        seconds = min(timeit.repeat(lambda: fn([1, 2, 3]), number=NUMBER, repeat=5))
+        print(f'{label:>6}: {seconds / NUMBER * 1e6:.3f} us per call')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+'''
+Cost of converting large nested values between Python data and sync data when they contain few or no `File`s.
+
+Run with `python benchmarks/bench_convert.py` from the repository root.
+'''
+import os
+import sys
+import timeit
+import tracemalloc
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jianmu.convert import transform  # noqa: E402
+from jianmu.definitions import File  # noqa: E402
+
+NUMBER = 10
+
+file = File(lastModified=0, name='a.txt', bytes=b'a', path='', size=1, type='text/plain', webkitRelativePath='')
+
+
+def replace_file(obj: Any) -> Any:
+    return {'type': 'File', 'name': obj.name} if isinstance(obj, File) else obj
+
+
+def convert_before(obj: Any) -> Any:
+    if isinstance(obj, File):
+        return {'type': 'File', 'name': obj.name}
+    elif isinstance(obj, list):
+        return [convert_before(item) for item in obj]
+    elif isinstance(obj, dict):
+        return {key: convert_before(value) for key, value in obj.items()}
+    return obj
+
+
+def convert_after(obj: Any) -> Any:
+    return transform(obj, replace_file, replace_containers=False)
+
+
+def make_rows(n: int) -> Any:
+    return [{'id': i, 'name': f'row {i}', 'tags': ['a', 'b', 'c'], 'point': {'x': i * 0.5, 'y': -i}} for i in range(n)]
+
+
+def make_deep(depth: int) -> Any:
+    root: Any = {'value': 0}
+    node = root
+    for i in range(depth):
+        node['child'] = {'value': i}
+        node = node['child']
+    return root
+
+
+def main() -> None:
+    rows = make_rows(50000)
+    rows_with_file = make_rows(50000)
+    rows_with_file[25000]['attachment'] = file
+    payloads = (
+        ('50k rows, no File', rows),
+        ('50k rows, one File', rows_with_file),
+    )
+    for name, payload in payloads:
+        print(name)
+        for label, fn in (('before', convert_before), ('after', convert_after)):
+            seconds = min(timeit.repeat(lambda: fn(payload), number=NUMBER, repeat=5))
+            tracemalloc.start()
+            fn(payload)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f'{label:>8}: {seconds / NUMBER * 1e3:.2f} ms per conversion, {peak / 1024 ** 2:.2f} MiB allocated')
+    deep = make_deep(sys.getrecursionlimit() * 2)
+    try:
+        convert_before(deep)
+        print('before: deep value converted')
+    except RecursionError:
+        print('before: RecursionError on a value nested deeper than the recursion limit')
+    convert_after(deep)
+    print(' after: deep value converted')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+'''
+Benchmarks of the IPC hot paths of the Python backend.
+
+`jianmu/jm.py` is started headlessly on a generated project, and a local HTTP and Socket.IO client stands in for the
+Electron renderer. Measured:
+
+- `/api/*` calls over HTTP and over the Socket.IO RPC transport: latency percentiles and throughput.
+- Reactive variable sync in both directions, by payload size.
+- `File` round trips by file size: inline base64, and blob upload plus download.
+- `jianmu.action` round trips to the renderer.
+
+Run with `python benchmarks/bench_ipc.py` from the repository root. Port 19020 must be free. Pass `--json PATH` to
+save the results, and `--compare PATH` to compare them with saved ones, which exits with status 1 if any latency has
+regressed by more than `--threshold`.
+'''
+import base64
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from json import dump, load
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import requests
+import socketio
+
+ROOT_PATH = Path(__file__).resolve().parent.parent
+
+BASE_URL = 'http://127.0.0.1:19020'
+
+APP_SOURCE = '''
+from reactivity import ref
+
+from jianmu import File, action, set_rpc_transport
+
+set_rpc_transport('socket')
+
+payload = ref('')
+
+
+def echo(value):
+    return value
+
+
+def set_payload(size: int, char: str):
+    payload.value = char * size
+
+
+def file_size(file: File):
+    return file.size
+
+
+def echo_file(file: File) -> File:
+    return File(lastModified=0, name=file.name, bytes=file.bytes, path='', size=file.size, type=file.type,
+                webkitRelativePath='')
+
+
+def beep(n: int):
+    for _ in range(n):
+        action.beep()
+'''
+
+Result = Dict[str, float]
+
+
+def summarize(samples: List[float]) -> Result:
+    '''Summarize latencies in seconds as milliseconds.'''
+    ordered = sorted(samples)
+    return {
+        'p50_ms': statistics.median(ordered) * 1e3,
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e3,
+        'mean_ms': statistics.mean(ordered) * 1e3,
+    }
+
+
+def measure(fn: Callable[[], Any], number: int, warmup: int = 10) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(number):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class Renderer:
+    '''A stand-in for the Electron renderer, connected to the backend over HTTP and Socket.IO.'''
+
+    def __init__(self) -> None:
+        self.http = requests.Session()
+        self.sio = socketio.Client()
+        self.events: Dict[str, threading.Event] = {}
+        self.messages: Dict[str, Any] = {}
+        self.results: Dict[int, Any] = {}
+        self.next_id = 0
+        self.sio.on('RPC:result', self._on_rpc_result)
+        # Every action is answered at once, as if it had been run by Electron.
+        self.sio.on('Action:beep', lambda *args: None)
+        for name in ('pyvar_payload__push_py_to_js', 'pyvar_payload__py_synced_with_js'):
+            self.sio.on(name, self._recorder(name))
+
+    def _recorder(self, name: str) -> Callable[..., None]:
+        def record(*args: Any) -> None:
+            self.messages[name] = args[0] if args else None
+            self.events.setdefault(name, threading.Event()).set()
+
+        return record
+
+    def _on_rpc_result(self, message: Dict[str, Any]) -> None:
+        self.results[message['id']] = message
+        self.events.setdefault(f'rpc:{message["id"]}', threading.Event()).set()
+
+    def wait(self, name: str, timeout: float = 30) -> Any:
+        event = self.events.setdefault(name, threading.Event())
+        if not event.wait(timeout):
+            raise TimeoutError(f'{name} is not received in {timeout} seconds')
+        event.clear()
+        return self.messages.get(name)
+
+    def post(self, name: str, args: Any) -> Any:
+        res = self.http.post(f'{BASE_URL}/api/{name}', json=args).json()
+        if res['error']:
+            raise RuntimeError(res['message'])
+        return res['data']
+
+    def rpc(self, name: str, args: Any) -> Any:
+        self.next_id += 1
+        call_id = self.next_id
+        self.sio.emit('RPC:call', {'id': call_id, 'name': name, 'args': args})
+        self.wait(f'rpc:{call_id}')
+        return self.results.pop(call_id)['data']
+
+
+def start_backend(project_path: Path) -> subprocess.Popen:
+    (project_path / 'src').mkdir()
+    (project_path / 'src' / '__init__.py').write_text('')
+    (project_path / 'src' / 'app.py').write_text(APP_SOURCE)
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([str(ROOT_PATH), str(project_path), env.get('PYTHONPATH', '')])
+    env['JIANMU_LOG_LEVEL'] = 'WARNING'
+    process = subprocess.Popen([sys.executable, str(ROOT_PATH / 'jianmu' / 'jm.py')],
+                               cwd=str(project_path),
+                               env=env,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'The backend has exited with status {process.returncode}')
+        try:
+            requests.get(f'{BASE_URL}/__jianmu_api__/heartbeat', timeout=1)
+            return process
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('The backend has not started in 60 seconds')
+
+
+def bench_calls(renderer: Renderer, number: int) -> Dict[str, Result]:
+    results = {}
+    args = [{'id': 1, 'name': 'row', 'tags': ['a', 'b']}]
+    for transport, call in (('http', renderer.post), ('socket', renderer.rpc)):
+        samples = measure(lambda: call('echo', args), number)
+        results[f'call.{transport}'] = dict(summarize(samples), calls_per_s=len(samples) / sum(samples))
+    # Throughput with concurrent callers, each with its own connection.
+    sessions = [requests.Session() for _ in range(8)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(len(sessions)) as executor:
+        for i in range(number):
+            executor.submit(sessions[i % len(sessions)].post, f'{BASE_URL}/api/echo', json=args)
+    results['call.http.concurrent'] = {'calls_per_s': number / (time.perf_counter() - start)}
+    return results
+
+
+def bench_sync(renderer: Renderer, number: int) -> Dict[str, Result]:
+    results = {}
+    renderer.sio.emit('pyvar_payload__get_py_value')
+    renderer.wait('pyvar_payload__push_py_to_js')
+    renderer.sio.emit('pyvar_payload__js_synced_with_py')
+    # Messages from the renderer are limited to 1 MB by the default `max_http_buffer_size` of Socket.IO.
+    for size in (100, 10_000, 500_000):
+        chars = iter('xy' * number)
+
+        def py_to_js() -> None:
+            # The change is made by Python, and the push is acknowledged as the renderer would. The value alternates,
+            # as assigning an equal value is not a change.
+            renderer.rpc('set_payload', [size, next(chars)])
+            renderer.wait('pyvar_payload__push_py_to_js')
+            renderer.sio.emit('pyvar_payload__js_synced_with_py')
+
+        def js_to_py() -> None:
+            renderer.sio.emit('pyvar_payload__push_js_to_py', {'data': 'y' * size})
+            renderer.wait('pyvar_payload__py_synced_with_js')
+
+        for direction, fn in (('py_to_js', py_to_js), ('js_to_py', js_to_py)):
+            samples = measure(fn, max(10, number // 10), warmup=3)
+            summary = summarize(samples)
+            summary['mb_per_s'] = size / statistics.median(samples) / 1e6
+            results[f'sync.{direction}.{size}B'] = summary
+    return results
+
+
+def bench_files(renderer: Renderer, number: int) -> Dict[str, Result]:
+    results = {}
+    for size in (1024, 1024**2, 16 * 1024**2):
+        content = os.urandom(size)
+        file_data = {'lastModified': 0, 'name': 'a.bin', 'path': '', 'size': size, 'type': 'application/octet-stream',
+                     'webkitRelativePath': ''}
+
+        def sync_object(data: Dict[str, Any]) -> Dict[str, Any]:
+            return {'protocol': 'jianmu-object-sync-protocol', 'version': 1, 'source': 'javascript', 'type': 'File',
+                    'data': data}
+
+        def inline() -> None:
+            data_uri = f'data:application/octet-stream;base64,{base64.b64encode(content).decode()}'
+            renderer.post('file_size', [sync_object(dict(file_data, base64Src=data_uri))])
+
+        def blob() -> None:
+            # Uploaded as raw bytes, passed by blob id, returned as a File and downloaded as raw bytes.
+            blob_id = renderer.http.post(f'{BASE_URL}/__jianmu_api__/blob', data=content).json()['data']
+            returned = renderer.post('echo_file', [sync_object(dict(file_data, blobId=blob_id))])
+            returned_blob_id = returned['data']['blobId']
+            renderer.http.get(f'{BASE_URL}/__jianmu_api__/blob/{returned_blob_id}').content
+            renderer.http.delete(f'{BASE_URL}/__jianmu_api__/blob/{returned_blob_id}')
+
+        repeat = max(3, number // 10 if size <= 1024**2 else number // 100)
+        for method, fn in (('inline', inline), ('blob', blob)):
+            samples = measure(fn, repeat, warmup=1)
+            summary = summarize(samples)
+            summary['mb_per_s'] = size / statistics.median(samples) / 1e6
+            results[f'file.{method}.{size}B'] = summary
+    return results
+
+
+def bench_actions(renderer: Renderer, number: int) -> Dict[str, Result]:
+    # Every call runs `n` actions back to back, so that the call overhead is amortized.
+    n = 20
+    samples = measure(lambda: renderer.rpc('beep', [n]), max(5, number // n), warmup=1)
+    return {'action.round_trip': summarize([sample / n for sample in samples])}
+
+
+def compare(results: Dict[str, Result], baseline: Dict[str, Result], threshold: float) -> bool:
+    '''Print the change of every latency against the baseline, and return whether any has regressed.'''
+    regressed = False
+    for name, result in results.items():
+        before = baseline.get(name, {}).get('p50_ms')
+        if before is None or 'p50_ms' not in result:
+            continue
+        change = result['p50_ms'] / before - 1
+        flag = 'REGRESSED' if change > threshold else ''
+        regressed = regressed or bool(flag)
+        print(f'{name:<32} {before:>10.3f} -> {result["p50_ms"]:>10.3f} ms  {change:+7.1%} {flag}')
+    return regressed
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--number', type=int, default=500, help='Number of calls of each benchmark.')
+    parser.add_argument('--json', metavar='PATH', help='Save the results to a JSON file.')
+    parser.add_argument('--compare', metavar='PATH', help='Compare the results with ones saved by --json.')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative p50 slowdown counted as regression.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as project_dir:
+        process = start_backend(Path(project_dir))
+        renderer = Renderer()
+        try:
+            renderer.sio.connect(BASE_URL)
+            results: Dict[str, Result] = {}
+            for bench in (bench_calls, bench_sync, bench_files, bench_actions):
+                results.update(bench(renderer, args.number))
+        finally:
+            if renderer.sio.connected:
+                renderer.sio.disconnect()
+            process.terminate()
+            process.wait()
+
+    for name, result in results.items():
+        print(f'{name:<32} ' + '  '.join(f'{key}={value:.3f}' for key, value in result.items()))
+    if args.json:
+        with open(args.json, 'w', encoding='utf8') as f:
+            dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf8') as f:
+            baseline = load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,16 @@
 from jianmu import exceptions, info
-from jianmu.action import show_save_dialog, show_open_dialog, show_message_box, show_error_box, show_item_in_folder, open_path, open_external, trash_item, beep
-from jianmu.definitions import File
+from jianmu.action import show_save_dialog, show_open_dialog, show_message_box, show_error_box, show_item_in_folder, open_path, open_external, trash_item, beep, batch_actions
+from jianmu.cancellation import CancellationToken, get_cancellation_token
+from jianmu.definitions import File, LazyFile
+from jianmu.memo import memoize
+from jianmu.pool import run_in_pool, set_pool_size
+from jianmu.rpc import set_rpc_transport
+from jianmu.serializer import Serializer, set_serializer
+from jianmu.snapshot import persisted_ref
+from jianmu.sync_policy import sync_policy
+from jianmu.typed_array import set_ref_value
 from jianmu.utils import base64_to_bytes, datauri_to_bytes, figure_to_datauri
+from jianmu.window import WindowedList
 
 __all__ = [
     'exceptions',
@@ -9,6 +18,7 @@ __all__ = [
     'datauri_to_bytes',
     'base64_to_bytes',
     'File',
+    'LazyFile',
     'figure_to_datauri',
     'show_save_dialog',
     'show_open_dialog',
@@ -19,4 +29,17 @@ __all__ = [
     'open_external',
     'trash_item',
     'beep',
+    'batch_actions',
+    'memoize',
+    'run_in_pool',
+    'set_pool_size',
+    'sync_policy',
+    'Serializer',
+    'set_serializer',
+    'set_ref_value',
+    'set_rpc_transport',
+    'CancellationToken',
+    'get_cancellation_token',
+    'WindowedList',
+    'persisted_ref',
 ]
@@ -1,6 +1,7 @@
-from typing import Any, Callable, List, Optional
+from typing import Any, List, Optional
 from typing_extensions import NotRequired, TypedDict
-from .sock import get_socketio
+from .dispatcher import call
+from .exceptions import JianmuException
 
 
 class FileFilter(TypedDict):
@@ -65,151 +66,74 @@ class OpenExternalOptions(TypedDict):
     '''
 
 
-def show_open_dialog(options: Optional[OpenDialogOptions] = None) -> OpenDialogReturnValue:
-    if options is None:
-        options = {}
-    return_value: Optional[OpenDialogReturnValue] = None
-
-    def callback(result: OpenDialogReturnValue) -> None:
-        nonlocal return_value
-        return_value = result
+class BatchActionItem(TypedDict):
+    action: str
+    '''
+    The name of the action, e.g. `trash-item` or `open-path`.
+    '''
+    args: List[Any]
 
-    socketio = get_socketio()
-    socketio.emit('Action:show-open-dialog', {'args': [options]}, callback=callback)
 
-    while True:
-        if return_value is not None:
-            return return_value
-        socketio.sleep(0.05)  # type: ignore
+class BatchActionResult(TypedDict):
+    result: Any
+    error: Optional[str]
+    '''
+    The error message if the action has failed, otherwise `None`.
+    '''
 
 
-def show_save_dialog(options: Optional[SaveDialogOptions] = None) -> SaveDialogReturnValue:
+def show_open_dialog(options: Optional[OpenDialogOptions] = None,
+                     timeout: Optional[float] = None) -> OpenDialogReturnValue:
     if options is None:
         options = {}
-    return_value: Optional[SaveDialogReturnValue] = None
-
-    def callback(result: SaveDialogReturnValue) -> None:
-        nonlocal return_value
-        return_value = result
-
-    socketio = get_socketio()
-    socketio.emit('Action:show-save-dialog', {'args': [options]}, callback=callback)
-
-    while True:
-        if return_value is not None:
-            return return_value
-        socketio.sleep(0.05)  # type: ignore
-
-
-def show_message_box(options: MessageBoxOptions) -> MessageBoxReturnValue:
-    return_value: Optional[MessageBoxReturnValue] = None
-
-    def callback(result: MessageBoxReturnValue) -> None:
-        nonlocal return_value
-        return_value = result
-
-    socketio = get_socketio()
-    socketio.emit('Action:show-message-box', {'args': [options]}, callback=callback)
-
-    while True:
-        if return_value is not None:
-            return return_value
-        socketio.sleep(0.05)  # type: ignore
-
+    return call('Action:show-open-dialog', [options], timeout)
 
-def show_error_box(title: str, content: str) -> None:
-    can_be_returned = False
 
-    def callback(result: None) -> None:
-        nonlocal can_be_returned
-        can_be_returned = True
-
-    socketio = get_socketio()
-    socketio.emit('Action:show-error-box', {'args': [title, content]}, callback=callback)
-
-    while True:
-        if can_be_returned:
-            return None
-        socketio.sleep(0.05)  # type: ignore
-
-
-def show_item_in_folder(full_path: str) -> None:
-    can_be_returned = False
+def show_save_dialog(options: Optional[SaveDialogOptions] = None,
+                     timeout: Optional[float] = None) -> SaveDialogReturnValue:
+    if options is None:
+        options = {}
+    return call('Action:show-save-dialog', [options], timeout)
 
-    def callback(result: None) -> None:
-        nonlocal can_be_returned
-        can_be_returned = True
 
-    socketio = get_socketio()
-    socketio.emit('Action:show-item-in-folder', {'args': [full_path]}, callback=callback)
+def show_message_box(options: MessageBoxOptions, timeout: Optional[float] = None) -> MessageBoxReturnValue:
+    return call('Action:show-message-box', [options], timeout)
 
-    while True:
-        if can_be_returned:
-            return None
-        socketio.sleep(0.05)  # type: ignore
 
+def show_error_box(title: str, content: str, timeout: Optional[float] = None) -> None:
+    call('Action:show-error-box', [title, content], timeout)
 
-def open_path(path: str) -> str:
-    return_value: Optional[str] = None
 
-    def callback(result: str) -> None:
-        nonlocal return_value
-        return_value = result
+def show_item_in_folder(full_path: str, timeout: Optional[float] = None) -> None:
+    call('Action:show-item-in-folder', [full_path], timeout)
 
-    socketio = get_socketio()
-    socketio.emit('Action:open-path', {'args': [path]}, callback=callback)
 
-    while True:
-        if return_value is not None:
-            return return_value
-        socketio.sleep(0.05)  # type: ignore
+def open_path(path: str, timeout: Optional[float] = None) -> str:
+    return call('Action:open-path', [path], timeout)
 
 
-def open_external(url: str, options: Optional[OpenExternalOptions] = None) -> None:
+def open_external(url: str, options: Optional[OpenExternalOptions] = None, timeout: Optional[float] = None) -> None:
     if options is None:
         options = {}
-    can_be_returned = False
-
-    def callback(result: None) -> None:
-        nonlocal can_be_returned
-        can_be_returned = True
-
-    socketio = get_socketio()
-    socketio.emit('Action:open-external', {'args': [url, options]}, callback=callback)
+    call('Action:open-external', [url, options], timeout)
 
-    while True:
-        if can_be_returned:
-            return None
-        socketio.sleep(0.05)  # type: ignore
 
+def trash_item(path: str, timeout: Optional[float] = None) -> None:
+    call('Action:trash-item', [path], timeout)
 
-def trash_item(path: str) -> None:
-    can_be_returned = False
 
-    def callback(result: None) -> None:
-        nonlocal can_be_returned
-        can_be_returned = True
+def beep(timeout: Optional[float] = None) -> None:
+    call('Action:beep', [], timeout)
 
-    socketio = get_socketio()
-    socketio.emit('Action:trash-item', {'args': [path]}, callback=callback)
 
-    while True:
-        if can_be_returned:
-            return None
-        socketio.sleep(0.05)  # type: ignore
-
-
-def beep() -> None:
-    can_be_returned = False
-
-    def callback(result: None) -> None:
-        nonlocal can_be_returned
-        can_be_returned = True
-
-    socketio = get_socketio()
-    socketio.emit('Action:beep', {'args': []}, callback=callback)
-
-    while True:
-        if can_be_returned:
-            return None
-        socketio.sleep(0.05)  # type: ignore
+def batch_actions(items: List[BatchActionItem], timeout: Optional[float] = None) -> List[BatchActionResult]:
+    '''
+    Run many actions in a single round trip to the renderer. A failed action does not stop the others, its error
+    message is returned in place of its result.
+    '''
+    if not items:
+        return []
+    results = call('Action:batch', [items], timeout)
+    if len(results) != len(items):
+        raise JianmuException(f'Expected {len(items)} results of the batch actions, but got {len(results)}')
+    return [{'result': result.get('result'), 'error': result.get('error')} for result in results]
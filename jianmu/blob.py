@@ -0,0 +1,98 @@
+import time
+import weakref
+from typing import Dict, Optional, Tuple
+from uuid import uuid4
+
+from jianmu.definitions import File, LazyFile
+
+BLOB_TTL = 60 * 60
+'''Seconds after their last use that uploaded bytes which are never bound, and held files, are dropped.'''
+
+
+class BlobStore:
+    '''
+    Raw bytes exchanged with the renderer over HTTP instead of base64 data URIs.
+
+    Bytes uploaded by the renderer are kept until they are bound to a `File`. Bytes of a bound `File` are served for
+    as long as the `File` is alive, under a blob id which stays the same while `File.bytes` is not replaced. A held
+    `File` is kept alive until the renderer releases it.
+
+    Uploaded bytes and held files which the renderer never binds or releases, e.g. because it has been closed, are
+    dropped `ttl` seconds after their last use.
+    '''
+
+    def __init__(self, ttl: float = BLOB_TTL) -> None:
+        self.ttl = ttl
+        self._uploaded_blobs: Dict[str, bytes] = {}
+        self._files: 'weakref.WeakValueDictionary[str, File]' = weakref.WeakValueDictionary()
+        self._held_files: Dict[str, File] = {}
+        self._file_blob_ids: Dict[int, Tuple[str, Optional[bytes]]] = {}
+        # When the uploaded bytes and the held files expire, by blob id.
+        self._expiry_times: Dict[str, float] = {}
+
+    def _touch(self, blob_id: str) -> None:
+        self._expiry_times[blob_id] = time.monotonic() + self.ttl
+
+    def expire(self) -> None:
+        '''Drop the uploaded bytes and the held files which have not been used for `ttl` seconds.'''
+        now = time.monotonic()
+        for blob_id in [blob_id for blob_id, expiry_time in self._expiry_times.items() if expiry_time <= now]:
+            self.release(blob_id)
+
+    def put(self, data: bytes) -> str:
+        self.expire()
+        blob_id = uuid4().hex
+        self._uploaded_blobs[blob_id] = data
+        self._touch(blob_id)
+        return blob_id
+
+    def get(self, blob_id: str) -> Optional[bytes]:
+        if blob_id in self._uploaded_blobs:
+            self._touch(blob_id)
+            return self._uploaded_blobs[blob_id]
+        file = self._files.get(blob_id)
+        return None if file is None else file.bytes
+
+    def get_file(self, blob_id: str) -> Optional[File]:
+        if blob_id in self._held_files:
+            self._touch(blob_id)
+        return self._files.get(blob_id)
+
+    def bind(self, file: File, blob_id: Optional[str] = None) -> str:
+        '''
+        Bind `file` to a blob id and return it.
+
+        If `blob_id` is given, the uploaded bytes under this id are released, and the id is served from `file` from
+        now on. Otherwise, the blob id that `file` is already bound to is reused if `file.bytes` has not changed.
+        '''
+        key = id(file)
+        # The content of a `LazyFile` is read from disk on access, so it is identified by the file itself.
+        content = None if isinstance(file, LazyFile) else file.bytes
+        if blob_id is None:
+            bound = self._file_blob_ids.get(key)
+            if bound is not None and bound[1] is content and self._files.get(bound[0]) is file:
+                return bound[0]
+            blob_id = uuid4().hex
+        elif self._uploaded_blobs.pop(blob_id, None) is not None and blob_id not in self._held_files:
+            self._expiry_times.pop(blob_id, None)
+        if key not in self._file_blob_ids:
+            weakref.finalize(file, self._file_blob_ids.pop, key, None)
+        self._file_blob_ids[key] = (blob_id, content)
+        self._files[blob_id] = file
+        return blob_id
+
+    def hold(self, file: File) -> str:
+        '''Bind `file` to a blob id, and keep it alive until the blob id is released.'''
+        self.expire()
+        blob_id = self.bind(file)
+        self._held_files[blob_id] = file
+        self._touch(blob_id)
+        return blob_id
+
+    def release(self, blob_id: str) -> None:
+        self._uploaded_blobs.pop(blob_id, None)
+        self._held_files.pop(blob_id, None)
+        self._expiry_times.pop(blob_id, None)
+
+
+blob_store = BlobStore()
@@ -0,0 +1,69 @@
+from inspect import Parameter, signature
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from jianmu.datatypes import JSONValue
+from jianmu.definitions import File
+from jianmu.exceptions import JianmuException
+from jianmu.log import logger
+
+POSITIONAL_KINDS = (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD)
+
+KEYWORD_KINDS = (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY, Parameter.VAR_KEYWORD)
+
+
+def mentions_file(annotation: Any) -> bool:
+    if isinstance(annotation, str):
+        return 'File' in annotation
+    if isinstance(annotation, type):
+        return issubclass(annotation, File)
+    return any(mentions_file(arg) for arg in getattr(annotation, '__args__', None) or ())
+
+
+class CallPlan:
+    '''
+    How the JSON arguments of a request are bound to the parameters of a Python function.
+
+    It is computed once when the function is registered, so that no introspection happens when the function is called.
+    '''
+
+    def __init__(self, func: Callable, name: Optional[str] = None) -> None:
+        # The name the function is registered under, which differs from `__name__` for e.g. `plus = add`.
+        self.name: str = name or getattr(func, '__name__', type(func).__name__)
+        try:
+            func_signature = signature(func)
+        except (TypeError, ValueError):
+            # Some builtins, e.g. `functools.reduce`, have no signature, so their arguments are passed as they are.
+            logger.debug('Function %s has no signature, its arguments are passed as they are.', self.name)
+            func_signature = None
+        self.has_signature = func_signature is not None
+        parameters = [] if func_signature is None else list(func_signature.parameters.values())
+        positional_parameters = [p for p in parameters if p.kind in POSITIONAL_KINDS]
+        self.param_num = len(parameters)
+        self.positional_num = len(positional_parameters)
+        # Missing arguments without a default value are filled with `None`.
+        self.defaults: List[Any] = [None if p.default is p.empty else p.default for p in positional_parameters]
+        self.required_num = sum(p.default is p.empty for p in positional_parameters)
+        self.accepts_var_args = any(p.kind == Parameter.VAR_POSITIONAL for p in parameters)
+        self.accepts_keywords = any(p.kind in KEYWORD_KINDS for p in parameters)
+        # Only functions which declare returning `File` have their results encoded as sync objects.
+        self.encodes_sync_objects = func_signature is not None and mentions_file(func_signature.return_annotation)
+
+    def bind(self, json: JSONValue) -> Tuple[List[Any], Dict[str, Any]]:
+        if not self.has_signature and isinstance(json, (list, dict)):
+            return ([], dict(json)) if isinstance(json, dict) else (list(json), {})
+        if isinstance(json, dict):
+            if not self.accepts_keywords:
+                raise JianmuException(f'Function {self.name} does not accept keyword arguments')
+            return [], dict(json)
+        if not isinstance(json, list):
+            raise JianmuException('The arguments must be an array or an object')
+        if not self.param_num:
+            return [], {}
+        args_num = len(json)
+        if not args_num and self.required_num:
+            raise JianmuException('The argument is empty')
+        if args_num < self.positional_num:
+            return json + self.defaults[args_num:], {}
+        if args_num > self.positional_num and not self.accepts_var_args:
+            return json[:self.positional_num], {}
+        return json, {}
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from .exceptions import CallCancelledError
+
+
+class CancellationToken:
+    '''
+    Whether the current call of a Python function has been cancelled by the renderer or has passed its deadline.
+
+    Cancellation is cooperative: a long-running function checks `cancelled` or calls `raise_if_cancelled()` between
+    steps. Generators and coroutines are stopped by Jianmu at their next step without checking it themselves.
+    '''
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        '''When the call times out, in `time.monotonic()` seconds.'''
+        self._cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+
+    def cancel(self) -> None:
+        if self._cancelled:
+            return
+        self._cancelled = True
+        for callback in self._callbacks[:]:
+            callback()
+
+    def add_cancel_callback(self, callback: Callable[[], None]) -> None:
+        '''Call `callback` when the token is cancelled by `cancel()`, but not when it passes its deadline.'''
+        self._callbacks.append(callback)
+
+    def remove_cancel_callback(self, callback: Callable[[], None]) -> None:
+        self._callbacks.remove(callback)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled or (self.deadline is not None and time.monotonic() >= self.deadline)
+
+    def remaining(self) -> Optional[float]:
+        '''Seconds left before the deadline, `None` if the call has no deadline.'''
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancelled:
+            raise CallCancelledError('The call is cancelled')
+        if self.cancelled:
+            raise CallCancelledError('The call has passed its deadline')
+
+
+current_token: ContextVar[Optional[CancellationToken]] = ContextVar('current_token', default=None)
+
+in_flight_calls: Dict[str, CancellationToken] = {}
+'''The tokens of the calls which are running, by call id.'''
+
+
+def get_cancellation_token() -> CancellationToken:
+    '''
+    Return the token of the call which is running. Outside of a call, a token which is never cancelled is returned.
+    '''
+    token = current_token.get()
+    return CancellationToken() if token is None else token
+
+
+def start_call(call_id: Optional[str], timeout: Optional[float] = None) -> CancellationToken:
+    '''Create the token of a call, which can be cancelled by `cancel_call(call_id)` until `finish_call` is called.'''
+    token = CancellationToken(timeout)
+    if call_id is not None:
+        in_flight_calls[call_id] = token
+    return token
+
+
+def finish_call(call_id: Optional[str], token: CancellationToken) -> None:
+    if call_id is not None and in_flight_calls.get(call_id) is token:
+        del in_flight_calls[call_id]
+
+
+def cancel_call(call_id: str) -> bool:
+    '''Cancel a running call. Returns `False` if no call with this id is running.'''
+    token = in_flight_calls.get(call_id)
+    if token is None:
+        return False
+    token.cancel()
+    return True
+
+
+async def run_cancellable(awaitable: Awaitable[Any], token: CancellationToken) -> Any:
+    '''Await `awaitable`, and cancel it as soon as `token` is cancelled or passes its deadline.'''
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(awaitable)
+
+    def on_cancel() -> None:
+        # The token is cancelled from the thread of the server, not the one of the event loop.
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
+
+    token.add_cancel_callback(on_cancel)
+    if token.cancelled:
+        task.cancel()
+    try:
+        return await asyncio.wait_for(task, token.remaining())
+    except asyncio.TimeoutError:
+        raise CallCancelledError('The call has passed its deadline')
+    except asyncio.CancelledError:
+        token.raise_if_cancelled()
+        raise
+    finally:
+        token.remove_cancel_callback(on_cancel)
+
+
+def iter_cancellable(items: Iterator[Any], token: CancellationToken, call_id: Optional[str]) -> Iterator[Any]:
+    '''
+    Iterate the items of a streamed call with its token as the current one, stop as soon as the token is cancelled,
+    and finish the call at the end.
+    '''
+    try:
+        while True:
+            token.raise_if_cancelled()
+            context_token = current_token.set(token)
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                current_token.reset(context_token)
+            yield item
+    finally:
+        finish_call(call_id, token)
+        close = getattr(items, 'close', None)
+        if close is not None:
+            close()
@@ -1,3 +1,4 @@
+import os
 import shutil
 import subprocess
 import sys
@@ -9,6 +10,13 @@ from typing import List
 def init_parser(subparsers):
     parser: ArgumentParser = subparsers.add_parser(
         'start', help='Run the jianmu application in production mode.')
+    parser.add_argument(
+        '--profile-startup',
+        nargs='?',
+        const='.jianmu/startup-profile.json',
+        metavar='REPORT_PATH',
+        help=
+        'Write a JSON report of the startup time of the Python backend (default: .jianmu/startup-profile.json).')
     parser.set_defaults(func=__func)
 
 
@@ -31,8 +39,12 @@ def __func(args):
         '--project-path',
         str(PROJECT_PATH),
     ]
+    env = dict(os.environ)
+    if args.profile_startup:
+        env['JIANMU_PROFILE_STARTUP'] = str((PROJECT_PATH / args.profile_startup).resolve())
+        print(f' * The startup profile will be written to {env["JIANMU_PROFILE_STARTUP"]}')
     try:
-        subprocess.run(run_jianmu_js_args, cwd=PROJECT_PATH)
+        subprocess.run(run_jianmu_js_args, cwd=PROJECT_PATH, env=env)
     except KeyboardInterrupt as e:
         print(
             ' * Getted KeyboardInterrupt, Jianmu Development Server has been stopped.'
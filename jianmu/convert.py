@@ -0,0 +1,85 @@
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
+
+# Values of these types are never replaced and contain nothing to walk into, so they are skipped without a call.
+ATOMIC_TYPES = (str, int, float, bool, type(None), bytes)
+
+Key = Union[str, int]
+
+
+def is_sync_object(obj: Any) -> bool:
+    # If obj is Dict, and obj has 'protocol', 'version', 'source', 'type', 'data' keys, it is a sync object.
+    return isinstance(
+        obj, dict) and 'protocol' in obj and 'version' in obj and 'source' in obj and 'type' in obj and 'data' in obj
+
+
+def transform(value: Any, replace: Callable[[Any], Any], replace_containers: bool = True) -> Any:
+    '''
+    Replace values nested in lists and dicts with `replace`, copying only the containers along the changed paths.
+
+    `replace` is called with every value that is not a str, int, float, bool, bytes or None, and not a list or dict
+    unless `replace_containers` is true. If it returns another object, the value is replaced with it and not walked
+    into. Otherwise, lists and dicts are walked into. If nothing is replaced, `value` itself is returned untouched.
+
+    The value is walked iteratively, so deeply nested values do not hit the recursion limit.
+    '''
+    if isinstance(value, ATOMIC_TYPES):
+        return value
+    is_container = isinstance(value, (list, dict))
+    replaced = replace(value) if replace_containers or not is_container else value
+    if replaced is not value or not is_container:
+        return replaced
+    # Every frame holds a container, the iterator over its items, the key of the container in its parent, and the
+    # replaced items of the container so far.
+    stack: List[Tuple[Any, Iterator[Tuple[Any, Any]], Any, Dict[Key, Any]]] = [(value, _iter_items(value), None, {})]
+    while True:
+        container, items, container_key, changes = stack[-1]
+        descended = False
+        for key, item in items:
+            cls = item.__class__
+            if cls in ATOMIC_TYPES:
+                continue
+            is_container = cls is dict or cls is list or isinstance(item, (list, dict))
+            if replace_containers or not is_container:
+                replaced = replace(item)
+                if replaced is not item:
+                    changes[key] = replaced
+                    continue
+            if is_container and item:
+                stack.append((item, _iter_items(item), key, {}))
+                descended = True
+                break
+        if descended:
+            continue
+        stack.pop()
+        result = _copy_with_changes(container, changes) if changes else container
+        if not stack:
+            return result
+        if result is not container:
+            stack[-1][3][container_key] = result
+
+
+def _iter_items(container: Union[list, dict]) -> Iterator[Tuple[Any, Any]]:
+    return iter(container.items()) if isinstance(container, dict) else enumerate(container)
+
+
+def _copy_with_changes(container: Union[list, dict], changes: Dict[Key, Any]) -> Union[list, dict]:
+    copied: Union[list, dict] = dict(container) if isinstance(container, dict) else list(container)
+    for key, item in changes.items():
+        copied[key] = item  # type: ignore
+    return copied
+
+
+def copy_containers(value: Any) -> Any:
+    '''Copy all the lists and dicts nested in `value`, other values are shared with the copy.'''
+    if not isinstance(value, (list, dict)):
+        return value
+    root: Union[list, dict] = dict(value) if isinstance(value, dict) else list(value)
+    stack = [root]
+    while stack:
+        container = stack.pop()
+        for key, item in _iter_items(container):
+            if isinstance(item, (list, dict)):
+                copied = dict(item) if isinstance(item, dict) else list(item)
+                container[key] = copied  # type: ignore
+                stack.append(copied)
+    return root
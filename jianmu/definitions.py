@@ -1,4 +1,7 @@
+import mmap
 from dataclasses import dataclass
+from io import BytesIO
+from typing import BinaryIO, Iterator
 
 
 @dataclass
@@ -11,4 +14,55 @@ class File:
     type: str
     webkitRelativePath: str
 
+    def open(self) -> BinaryIO:
+        return BytesIO(self.bytes)
 
+    def iter_chunks(self, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        with self.open() as f:
+            chunk = f.read(chunk_size)
+            while chunk:
+                yield chunk
+                chunk = f.read(chunk_size)
+
+
+class LazyFile(File):
+    '''
+    A `File` which already exists on disk at `path`.
+
+    Its content is not held in memory. `bytes` reads the whole file on every access, so prefer `open()`,
+    `iter_chunks()` or `mmap()` for large files.
+    '''
+
+    def __init__(self, lastModified: int, name: str, path: str, size: int, type: str, webkitRelativePath: str):
+        self.lastModified = lastModified
+        self.name = name
+        self.path = path
+        self.size = size
+        self.type = type
+        self.webkitRelativePath = webkitRelativePath
+
+    def __repr__(self) -> str:
+        return (f'LazyFile(lastModified={self.lastModified!r}, name={self.name!r}, path={self.path!r}, '
+                f'size={self.size!r}, type={self.type!r}, webkitRelativePath={self.webkitRelativePath!r})')
+
+    def __eq__(self, other: object) -> bool:
+        # Compared by metadata instead of `bytes`, which would read both files, e.g. when a reactive variable holding
+        # the file is assigned and compares the new value with the old one.
+        if not isinstance(other, LazyFile):
+            return NotImplemented
+        return (self.path, self.size, self.lastModified, self.name, self.type,
+                self.webkitRelativePath) == (other.path, other.size, other.lastModified, other.name, other.type,
+                                             other.webkitRelativePath)
+
+    def open(self) -> BinaryIO:
+        return open(self.path, 'rb')
+
+    def mmap(self) -> mmap.mmap:
+        '''Map the file into memory read-only. The file must not be empty.'''
+        with self.open() as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def bytes(self) -> bytes:  # type: ignore
+        with self.open() as f:
+            return f.read()
@@ -0,0 +1,81 @@
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from .exceptions import ActionCancelledError, ActionTimeoutError
+from .sock import get_socketio
+
+default_timeout: Optional[float] = None
+'''Seconds to wait for the renderer to answer a request, `None` means waiting forever.'''
+
+pending_requests: Dict[str, 'Request'] = {}
+
+
+class Request:
+    '''
+    A request emitted to the renderer, which is resolved as soon as the renderer acknowledges it.
+    '''
+
+    def __init__(self, event: str, args: List[Any]) -> None:
+        self.id = uuid4().hex
+        self.event = event
+        self.args = args
+        self.result: Any = None
+        self.done = False
+        self.cancelled = False
+        self._waiter = get_socketio().server.eio.create_event()
+
+    def send(self) -> 'Request':
+        pending_requests[self.id] = self
+        get_socketio().emit(self.event, {'id': self.id, 'args': self.args}, callback=self._resolve)
+        return self
+
+    def _resolve(self, *args: Any) -> None:
+        if self.done:
+            return
+        self.result = args[0] if args else None
+        self._finish()
+
+    def cancel(self) -> None:
+        if self.done:
+            return
+        self.cancelled = True
+        self._finish()
+
+    def _finish(self) -> None:
+        self.done = True
+        pending_requests.pop(self.id, None)
+        self._waiter.set()
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        if timeout is None:
+            timeout = default_timeout
+        if not self._waiter.wait(timeout):
+            pending_requests.pop(self.id, None)
+            raise ActionTimeoutError(f'{self.event} is not answered by the renderer in {timeout} seconds')
+        if self.cancelled:
+            raise ActionCancelledError(f'{self.event} is cancelled')
+        return self.result
+
+
+def send(event: str, args: List[Any]) -> Request:
+    '''Emit `event` to the renderer without waiting for the answer.'''
+    return Request(event, args).send()
+
+
+def call(event: str, args: List[Any], timeout: Optional[float] = None) -> Any:
+    '''Emit `event` to the renderer and wait for the answer.'''
+    return send(event, args).wait(timeout)
+
+
+def cancel(request_id: str) -> bool:
+    '''Cancel a pending request. Returns `False` if the request has already been resolved.'''
+    request = pending_requests.get(request_id)
+    if request is None:
+        return False
+    request.cancel()
+    return True
+
+
+def set_default_timeout(timeout: Optional[float]) -> None:
+    global default_timeout
+    default_timeout = timeout
@@ -1,2 +1,14 @@
 class JianmuException(Exception):
     pass
+
+
+class ActionTimeoutError(JianmuException):
+    pass
+
+
+class ActionCancelledError(JianmuException):
+    pass
+
+
+class CallCancelledError(JianmuException):
+    pass
@@ -1,121 +1,307 @@
 # sourcery skip: avoid-builtin-shadow
-import base64
-import contextlib
+import time
+
+startup_time = time.perf_counter()
+
+import os
 import sys
 
+# The path of the startup profile report, set by `jianmu start --profile-startup` or `jianmu dev --profile-startup`.
+startup_profile_path = os.environ.get('JIANMU_PROFILE_STARTUP')
+startup_profiler = None
+
+if startup_profile_path:
+    import importlib.util
+
+    # The profiler is loaded from its file rather than imported, so that the imports of the `jianmu` package itself
+    # and of the framework are timed as well.
+    profiling_spec = importlib.util.spec_from_file_location(
+        'jianmu.profiling', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiling.py'))
+    profiling = importlib.util.module_from_spec(profiling_spec)  # type: ignore
+    sys.modules['jianmu.profiling'] = profiling
+    profiling_spec.loader.exec_module(profiling)  # type: ignore
+    startup_profiler = profiling.StartupProfiler(startup_time)
+    startup_profiler.start_timing_imports()
+
+import asyncio
+import base64
+import contextvars
+import math
+from copy import deepcopy
+from time import perf_counter
+
 sys.stdout = open(sys.stdout.fileno(), mode='w', encoding='utf8', buffering=1)  # Set stdout to unbuffered mode
 sys.stderr = open(sys.stderr.fileno(), mode='w', encoding='utf8', buffering=1)  # Set stderr to unbuffered mode
 
-import os
-from inspect import signature
-from pathlib import Path
-from typing import Any, Callable, Dict, List
+from inspect import isasyncgen, iscoroutine, isgenerator
+from typing import Any, AsyncGenerator, Awaitable, Callable, Coroutine, Dict, Iterator, List, Optional, Tuple, Union
 
 import reactivity as reactivity_module
-from flask import Flask, request
-from reactivity import Ref, is_computed_ref, is_ref, to_raw, watch
-
+from flask import Flask, Response, request, send_file, stream_with_context
+from flask_socketio import join_room, leave_room
+from reactivity import Ref, is_computed_ref, is_ref, mark_raw, to_raw, watch
+
+from jianmu.blob import blob_store
+from jianmu.call_plan import CallPlan
+from jianmu.cancellation import (cancel_call, current_token, finish_call, in_flight_calls, iter_cancellable,
+                                  run_cancellable, start_call)
+from jianmu.convert import copy_containers, is_sync_object, transform
 from jianmu.datatypes import JSONValue
-from jianmu.definitions import File
-from jianmu.exceptions import JianmuException
+from jianmu.definitions import File, LazyFile
+from jianmu.exceptions import CallCancelledError, JianmuException
 from jianmu.info import jianmu_info
+from jianmu.loader import import_src_modules, import_times, timed_import
+from jianmu.log import logger
+from jianmu.metrics import get_function_metrics, get_metrics, get_variable_metrics, metering_emit
+from jianmu.patch import apply_patch, diff
+from jianmu.pool import run_blocking
+from jianmu.rpc import ResponseSequencer, rpc_options
+from jianmu.serializer import get_serializer
+from jianmu.session import PushedState, VariableSession
+from jianmu.snapshot import get_snapshot
 from jianmu.sock import get_socketio, init_socketio
+from jianmu.sync_policy import PushScheduler, get_sync_policy
+from jianmu.typed_array import (ByIdentity, dataframe_to_table_data, is_array_like, is_dataframe, is_ndarray,
+                                mark_raw_array, ndarray_to_typed_array_data, set_ref_value, table_data_to_dataframe,
+                                typed_array_data_to_ndarray)
+from jianmu.upload import upload_store
+from jianmu.window import ListChange, ListWindow, WindowedList
 from jianmu.utils import datauri_to_bytes
 
 flask_app = Flask(__name__)
 init_socketio(flask_app)
 socketio = get_socketio()
 
-for module_name in os.listdir(Path.cwd()):
-    if module_name.endswith('.py') and os.path.isfile(module_name):
-        module_name = module_name[:-3]
-    if module_name.startswith('__') and module_name.endswith('__'):
-        continue
-    if module_name == 'app':
-        continue
-    with contextlib.suppress(ImportError):
-        module = __import__(f'src.{module_name}', fromlist=[module_name])
-        sys.modules[module_name] = module
-        del sys.modules[f'src.{module_name}']
+if startup_profiler is not None:
+    startup_profiler.mark('framework_imported')
+
+import_src_modules()
 
-from src import app  # type: ignore
+app = timed_import('src.app')
 
+if startup_profiler is not None:
+    startup_profiler.stop_timing_imports()
+    startup_profiler.mark('src_imported')
 
-def is_sync_object(obj: Any) -> bool:
-    # If obj is Dict, and obj has 'protocol', 'version', 'source', 'type', 'data' keys, it is a sync object.
-    return isinstance(
-        obj, dict) and 'protocol' in obj and 'version' in obj and 'source' in obj and 'type' in obj and 'data' in obj
+for module_name, seconds in import_times.items():
+    logger.debug('Module %s is imported in %.1f ms.', module_name, seconds * 1000)
 
 
 def sync_file_data_to_file(file_data: Dict[str, Any]) -> File:
-    return File(
+    blob_id = file_data.get('blobId')
+    path = file_data['path']
+    if path and os.path.isfile(path) and os.path.getsize(path) == file_data['size']:
+        # The file exists on disk, so its content is read on demand instead of being decoded now.
+        file: File = LazyFile(
+            lastModified=file_data['lastModified'],
+            name=file_data['name'],
+            path=path,
+            size=file_data['size'],
+            type=file_data['type'],
+            webkitRelativePath=file_data['webkitRelativePath'],
+        )
+        if blob_id is not None:
+            blob_store.bind(file, blob_id)
+        return file
+    upload_id = file_data.get('uploadId')
+    if upload_id is not None:
+        # The content has been uploaded in chunks to /__jianmu_api__/upload/<uploadId> and spooled to disk. It can be
+        # downloaded back under the same id.
+        file = upload_store.get_file(upload_id, file_data)
+        blob_store.bind(file, upload_id)
+        return file
+    if blob_id is None:
+        if 'base64Src' not in file_data:
+            raise JianmuException(f'The content of file {file_data["name"]} is missing')
+        content = datauri_to_bytes(file_data['base64Src'])
+    else:
+        blob = blob_store.get(blob_id)
+        if blob is None:
+            raise JianmuException(f'Unknown blob id: {blob_id}')
+        content = blob
+    file = File(
         lastModified=file_data['lastModified'],
         name=file_data['name'],
-        bytes=datauri_to_bytes(file_data['base64Src']),
-        path=file_data['path'],
+        bytes=content,
+        path=path,
         size=file_data['size'],
         type=file_data['type'],
         webkitRelativePath=file_data['webkitRelativePath'],
     )
+    if blob_id is not None:
+        blob_store.bind(file, blob_id)
+    return file
 
 
-def file_to_sync_file_data(file: File) -> Dict[str, Any]:
-    base64Src = f'data:{file.type};base64,{base64.b64encode(file.bytes).decode()}'
-    return {
+def file_to_sync_file_data(file: File, use_blob: bool = False) -> Dict[str, Any]:
+    file_data = {
         'lastModified': file.lastModified,
         'name': file.name,
-        'base64Src': base64Src,
         'path': file.path,
         'size': file.size,
         'type': file.type,
         'webkitRelativePath': file.webkitRelativePath,
     }
+    if use_blob:
+        # The renderer downloads the raw bytes from /__jianmu_api__/blob/<blobId>.
+        file_data['blobId'] = blob_store.bind(file)
+    else:
+        file_data['base64Src'] = f'data:{file.type};base64,{base64.b64encode(file.bytes).decode()}'
+    return file_data
 
 
-def sync_object_to_py_data(obj: Any) -> Any:
+def sync_object_to_py_value(obj: Any) -> Any:
     # obj is json object
-    if is_sync_object(obj):
-        if obj['type'] == 'File':
-            return sync_file_data_to_file(obj['data'])
-        else:
-            raise JianmuException(f'Unknown sync object type: {obj["type"]}')
-    elif isinstance(obj, list):
-        return [sync_object_to_py_data(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: sync_object_to_py_data(value) for key, value in obj.items()}
-    return obj
-
-
-def py_data_to_sync_data(obj: Any) -> Any:
+    if not is_sync_object(obj):
+        return obj
+    if obj['type'] == 'File':
+        return sync_file_data_to_file(obj['data'])
+    # Arrays and DataFrames cannot be made reactive, they are synced when they are replaced as a whole.
+    elif obj['type'] == 'TypedArray':
+        return mark_raw(typed_array_data_to_ndarray(obj['data']))
+    elif obj['type'] == 'Table':
+        return mark_raw(table_data_to_dataframe(obj['data']))
+    else:
+        raise JianmuException(f'Unknown sync object type: {obj["type"]}')
+
+
+def py_value_to_sync_object(obj: Any, use_blob: bool = False) -> Any:
     if isinstance(obj, File):
         return {
             'protocol': 'jianmu-object-sync-protocol',
             'version': 1,
             'source': 'javascript',
             'type': 'File',
-            'data': file_to_sync_file_data(obj),
+            'data': file_to_sync_file_data(obj, use_blob),
+        }
+    elif is_ndarray(obj):
+        return {
+            'protocol': 'jianmu-object-sync-protocol',
+            'version': 1,
+            'source': 'python',
+            'type': 'TypedArray',
+            'data': ndarray_to_typed_array_data(obj),
+        }
+    elif is_dataframe(obj):
+        return {
+            'protocol': 'jianmu-object-sync-protocol',
+            'version': 1,
+            'source': 'python',
+            'type': 'Table',
+            'data': dataframe_to_table_data(obj),
         }
-    elif isinstance(obj, list):
-        return [py_data_to_sync_data(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: py_data_to_sync_data(value) for key, value in obj.items()}
     return obj
 
 
+def sync_object_to_py_data(obj: Any) -> Any:
+    # Only the lists and dicts which contain sync objects are copied, the rest of `obj` is returned as it is.
+    return transform(obj, sync_object_to_py_value)
+
+
+def py_data_to_sync_data(obj: Any, use_blob: bool = False) -> Any:
+    # The raw value is walked, as every item read from a reactive list or dict is wrapped in a reactive proxy.
+    return transform(to_raw(obj), lambda value: py_value_to_sync_object(value, use_blob), replace_containers=False)
+
+
+def encode_result(data: Any) -> Any:
+    # Returned files may not be referenced anywhere else, so they are held until the renderer releases their blob ids.
+    def replace(value: Any) -> Any:
+        if isinstance(value, File):
+            blob_store.hold(value)
+        return py_value_to_sync_object(value, True)
+
+    return transform(data, replace, replace_containers=False)
+
+
 @flask_app.route('/')
 def index():
     return '<h1>Powered by Jianmu Framework</h1>'
 
 
 def get_info():
-    return jianmu_info, '获取程序信息成功'
+    return dict(jianmu_info, rpc=rpc_options), '获取程序信息成功'
+
+
+def get_metrics_info():
+    return get_metrics(), '获取性能指标成功'
 
 
 @flask_app.route('/__jianmu_api__/heartbeat', methods=['GET'])
 def heartbeat():
+    global startup_profiler
+    if startup_profiler is not None and startup_profile_path is not None:
+        startup_profiler.mark('first_heartbeat')
+        startup_profiler.write(startup_profile_path)
+        logger.info('Startup profile is written to %s', startup_profile_path)
+        startup_profiler = None
     return 'ok'
 
 
+@flask_app.route('/__jianmu_api__/blob', methods=['POST'])
+def upload_blob():
+    return respond(0, '', blob_store.put(request.get_data(cache=False)))
+
+
+@flask_app.route('/__jianmu_api__/blob/<blob_id>', methods=['GET'])
+def download_blob(blob_id: str):
+    # The content of a `File` is streamed, and a download can be resumed with a Range header.
+    file = blob_store.get_file(blob_id)
+    if isinstance(file, LazyFile):
+        return send_file(file.path, mimetype='application/octet-stream')
+    if file is not None:
+        return send_file(file.open(), mimetype='application/octet-stream')
+    blob = blob_store.get(blob_id)
+    if blob is None:
+        # The `LazyFile` of an upload may have been collected, while its spool file is still kept.
+        upload_path = upload_store.get_path(blob_id)
+        if upload_path is None:
+            return Response(status=404)
+        return send_file(str(upload_path), mimetype='application/octet-stream')
+    return Response(blob, mimetype='application/octet-stream')
+
+
+@flask_app.route('/__jianmu_api__/blob/<blob_id>', methods=['DELETE'])
+def release_blob(blob_id: str):
+    blob_store.release(blob_id)
+    return respond(0, '', None)
+
+
+@flask_app.route('/__jianmu_api__/upload', methods=['POST'])
+def create_upload():
+    return respond(0, '', upload_store.create())
+
+
+@flask_app.route('/__jianmu_api__/upload/<upload_id>', methods=['GET'])
+def get_upload_offset(upload_id: str):
+    try:
+        return respond(0, '', upload_store.get_offset(upload_id))
+    except JianmuException as e:
+        return respond(1, e.args[0], None)
+
+
+@flask_app.route('/__jianmu_api__/upload/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id: str):
+    offset = request.args.get('offset', 0, type=int)
+    try:
+        return respond(0, '', upload_store.append(upload_id, offset, request.stream))
+    except JianmuException as e:
+        return respond(1, e.args[0], None)
+
+
+@flask_app.route('/__jianmu_api__/upload/<upload_id>', methods=['DELETE'])
+def release_upload(upload_id: str):
+    try:
+        upload_store.release(upload_id)
+    except JianmuException as e:
+        return respond(1, e.args[0], None)
+    return respond(0, '', None)
+
+
+@flask_app.route('/__jianmu_api__/cancel/<call_id>', methods=['POST'])
+def cancel(call_id: str):
+    return respond(0, '', cancel_call(call_id))
+
+
 def respond(error: int, message: str, data: JSONValue) -> Dict[str, Any]:
     return {
         'error': error,
@@ -124,25 +310,100 @@ def respond(error: int, message: str, data: JSONValue) -> Dict[str, Any]:
     }
 
 
-def wrapper(func: Callable):
+def run_coroutine(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    # The event loop runs in a native thread, so that it does not block the other requests while it waits. The
+    # context carries the cancellation token of the call into the thread.
+    return run_blocking(contextvars.copy_context().run, asyncio.run, coroutine)
 
-    def view_func():
-        sys.stdout.write(f'Function {func.__name__} is called.\n')
+
+def iter_async_generator(async_generator: AsyncGenerator[Any, None]) -> Iterator[Any]:
+    loop = asyncio.new_event_loop()
+
+    def run_step(awaitable: Awaitable[Any]) -> Any:
+        # Every step runs in a native thread like `run_coroutine`, with the context of the step.
+        return run_blocking(contextvars.copy_context().run, loop.run_until_complete, awaitable)
+
+    try:
+        while True:
+            try:
+                yield run_step(async_generator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        run_step(async_generator.aclose())
+        loop.close()
+
+
+def iter_stream_envelopes(items: Iterator[JSONValue]) -> Iterator[Dict[str, Any]]:
+    try:
+        for item in items:
+            yield respond(0, '', item)
+    except Exception as e:
+        yield respond(1, e.args[0], None) if e.args else respond(1, str(e), None)
+
+
+def stream_respond(items: Iterator[JSONValue]) -> Response:
+    # Every item is sent as soon as it is produced, as one JSON envelope per line.
+    def generate() -> Iterator[str]:
+        serializer = get_serializer()
+        for envelope in iter_stream_envelopes(items):
+            yield serializer.dumps(envelope) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def load_request_json() -> JSONValue:
+    if not request.is_json:
+        raise JianmuException('The Content-Type header is not application/json')
+    return get_serializer().loads(request.get_data(cache=False))
+
+
+def parse_timeout(value: Any) -> Optional[float]:
+    '''Read the timeout of a call in seconds, which is ignored if it is not a finite number.'''
+    try:
+        timeout = float(value)
+    except (TypeError, ValueError):
+        return None
+    return timeout if math.isfinite(timeout) else None
+
+
+rpc_calls: Dict[str, Callable[..., Union[Dict[str, Any], Iterator[JSONValue]]]] = {}
+'''The calls of the registered functions by name, shared by the HTTP and the Socket.IO transports.'''
+
+
+def wrapper(func: Callable, name: Optional[str] = None):
+    plan = CallPlan(func, name)
+    metrics = get_function_metrics(plan.name)
+
+    def call(load_json: Callable[[], JSONValue],
+             call_id: Optional[str] = None,
+             timeout: Optional[float] = None) -> Union[Dict[str, Any], Iterator[JSONValue]]:
+        logger.debug('Function %s is called.', plan.name)
+        metrics.calls += 1
+        token = start_call(call_id, timeout)
+        context_token = current_token.set(token)
+        is_streaming = False
         try:
-            param_num = len(signature(func).parameters)
-            json = request.get_json()
-            if json is None:
-                raise JianmuException('The Content-Type header is not application/json')
-            args: List[Any] = json
-            args_num = len(args)
-            if param_num:
-                if not args:
-                    raise JianmuException('The argument is empty')
-                if param_num != args_num:
-                    args = [args[i] if i < args_num else None for i in range(param_num)]
-                data = func(*args)
-            else:
-                data = func()
+            start_time = perf_counter()
+            json = load_json()
+            args, kwargs = plan.bind(json)
+            args = sync_object_to_py_data(args)
+            kwargs = sync_object_to_py_data(kwargs)
+            decoded_time = perf_counter()
+            metrics.decode_time.observe(decoded_time - start_time)
+            data = func(*args, **kwargs)
+            if iscoroutine(data):
+                data = run_coroutine(run_cancellable(data, token))
+            metrics.execute_time.observe(perf_counter() - decoded_time)
+            # The result of a cancelled call is stale, so it is not encoded.
+            token.raise_if_cancelled()
+            if plan.encodes_sync_objects and not isgenerator(data) and not isasyncgen(data):
+                # Returned files are downloaded from /__jianmu_api__/blob/<blobId> instead of being inlined.
+                data = tuple(map(encode_result, data)) if isinstance(data, tuple) else encode_result(data)
+            if isgenerator(data) or isasyncgen(data):
+                is_streaming = True
+                items = data if isgenerator(data) else iter_async_generator(data)
+                return iter_cancellable(items, token, call_id)
             if isinstance(data, tuple):
                 if not data:
                     return respond(0, '', None)
@@ -153,57 +414,449 @@ def wrapper(func: Callable):
                 return respond(0, data[1], data[0])
             return respond(0, '', data)
         except Exception as e:
+            if isinstance(e, CallCancelledError):
+                metrics.cancellations += 1
+            else:
+                metrics.errors += 1
             return respond(1, e.args[0], None) if e.args else respond(1, str(e), None)
+        finally:
+            current_token.reset(context_token)
+            if not is_streaming:
+                finish_call(call_id, token)
 
+    def view_func():
+        metrics.request_bytes += request.content_length or 0
+        # A call can be cancelled by its id with /__jianmu_api__/cancel/<callId>.
+        call_id = request.headers.get('X-Jianmu-Call-Id')
+        timeout = parse_timeout(request.headers.get('X-Jianmu-Timeout'))
+        result = call(load_request_json, call_id, timeout)
+        if not isinstance(result, dict):
+            # The items of a stream are encoded while they are sent, so they are not measured here.
+            return stream_respond(result)
+        start_time = perf_counter()
+        body = get_serializer().dumps_bytes(result)
+        metrics.encode_time.observe(perf_counter() - start_time)
+        metrics.response_bytes += len(body)
+        return Response(body, mimetype='application/json')
+
+    rpc_calls[plan.name] = call
     return view_func
 
 
+sequencers: Dict[str, ResponseSequencer] = {}
+'''The sequencers of the results of ordered RPC calls by Socket.IO session id.'''
+
+
+def emit_rpc_message(event: str, envelope: Dict[str, Any], sid: str) -> bool:
+    '''Emit an envelope of an RPC call, or an error envelope if it cannot be serialized, and return whether it could.'''
+    try:
+        socketio.emit(event, envelope, to=sid)
+        return True
+    except Exception as e:
+        error = respond(1, f'The result cannot be serialized: {e}', None)
+        socketio.emit(event, dict(error, id=envelope.get('id')), to=sid)
+        return False
+
+
+def run_rpc_call(message: Dict[str, Any], sid: str) -> Dict[str, Any]:
+    call_id = message.get('id')
+    call = rpc_calls.get(message.get('name', ''))
+    if call is None:
+        return respond(1, f'Unknown function: {message.get("name")}', None)
+    result = call(lambda: message.get('args', []), f'{sid}:{call_id}', parse_timeout(message.get('timeout')))
+    if isinstance(result, dict):
+        return result
+    # The items of a stream are sent as they are produced, and the end of the stream is sent as the result.
+    envelope = respond(0, '', None)
+    for envelope in iter_stream_envelopes(result):
+        if not emit_rpc_message('RPC:stream', dict(envelope, id=call_id), sid):
+            return respond(1, 'An item of the stream cannot be serialized', None)
+    return respond(0, '', None) if envelope['error'] == 0 else envelope
+
+
+@socketio.on('RPC:call')
+def on_rpc_call(message: Dict[str, Any]):
+    # Every message is handled in its own greenlet, so the calls of a session run concurrently.
+    sid = request.sid  # type: ignore
+    call_id = message.get('id')
+    sequencer = None
+    position = 0
+    if rpc_options['ordered']:
+        if sid not in sequencers:
+            sequencers[sid] = ResponseSequencer(lambda result: emit_rpc_message('RPC:result', result, sid))
+        sequencer = sequencers[sid]
+        position = sequencer.reserve()
+    try:
+        result = run_rpc_call(message, sid)
+    except Exception as e:
+        # Every call is answered, and in ordered mode its position is filled, so the results after it are not held.
+        logger.exception('Failed to handle the RPC call %s.', call_id)
+        result = respond(1, str(e), None)
+    result = dict(result, id=call_id)
+    if sequencer is None:
+        emit_rpc_message('RPC:result', result, sid)
+    else:
+        sequencer.resolve(position, result)
+
+
+@socketio.on('RPC:cancel')
+def on_rpc_cancel(message: Dict[str, Any]):
+    cancel_call(f'{request.sid}:{message.get("id")}')  # type: ignore
+
+
+session_cleanups: List[Callable[[str], None]] = []
+'''Called with the id of every Socket.IO session which disconnects.'''
+
+
+@socketio.on('disconnect')
+def on_disconnect():
+    sid = request.sid  # type: ignore
+    sequencers.pop(sid, None)
+    for cleanup in session_cleanups:
+        cleanup(sid)
+    # Nobody is waiting for the results of the calls of a closed session any more.
+    for call_id in [call_id for call_id in in_flight_calls if call_id.startswith(f'{sid}:')]:
+        cancel_call(call_id)
+
+
 def register_reactive_var(name: str, var: Ref):
     event_name = f'pyvar_{name}'
     GET_PY_VALUE = f'{event_name}__get_py_value'
     PUSH_PY_TO_JS = f'{event_name}__push_py_to_js'
     PUSH_JS_TO_PY = f'{event_name}__push_js_to_py'
+    PATCH_PY_TO_JS = f'{event_name}__patch_py_to_js'
+    PATCH_JS_TO_PY = f'{event_name}__patch_js_to_py'
     PY_SYNCED_WITH_JS = f'{event_name}__py_synced_with_js'
     JS_SYNCED_WITH_PY = f'{event_name}__js_synced_with_py'
-    is_computed = is_computed_ref(val)
-
-    is_syncing = False
-
-    latest_pushed_py_value = None
-
-    def set_sync_status_to_syncing():
-        nonlocal is_syncing
-        is_syncing = True
+    UNSUBSCRIBE = f'{event_name}__unsubscribe'
+    # The room of the sessions which have subscribed to `var`.
+    ROOM = event_name
+    is_computed = is_computed_ref(var)
+    mark_raw_array(var)
+
+    # Every renderer session, e.g. every window, is synced separately, so that the handshake of one does not block
+    # the others.
+    sessions: Dict[str, VariableSession] = {}
+
+    # Incremented for every value pushed to or received from a session, so that the session can detect a missed update.
+    version = 0
+
+    # Incremented on every change of `var`, so that whether a session is up to date is an O(1) check.
+    change_version = 0
+
+    # The latest value pushed by Python to the sessions in patch mode in each blob mode, which is reused until `var`
+    # changes. The values pushed to the other sessions are not kept, so that no copy of a large value stays alive.
+    latest_states: Dict[bool, PushedState] = {}
+
+    metrics = get_variable_metrics(name)
+
+    # A persisted variable is saved whenever it changes, whether or not it is subscribed.
+    snapshot = get_snapshot(var)
+    if snapshot is not None:
+        snapshot.start()
+
+    # `var` is only watched while at least one session subscribes to it.
+    stop_watching: Optional[Callable[[], None]] = None
+
+    def subscribe() -> VariableSession:
+        nonlocal stop_watching, change_version
+        sid = request.sid  # type: ignore
+        session = sessions.get(sid)
+        if session is None:
+            session = sessions[sid] = VariableSession(sid)
+            metrics.subscribers = len(sessions)
+            join_room(ROOM)
+        if stop_watching is None:
+            # `var` may have changed while it was not watched.
+            change_version += 1
+            stop_watching = watch(watch_source, on_change, deep=True)
+        return session
+
+    def unsubscribe(sid: str):
+        nonlocal stop_watching
+        if sessions.pop(sid, None) is None:
+            return
+        metrics.subscribers = len(sessions)
+        if not any(session.is_patch_mode for session in sessions.values()):
+            latest_states.clear()
+        if not sessions and stop_watching is not None:
+            stop_watching()
+            stop_watching = None
+
+    session_cleanups.append(unsubscribe)
+
+    @socketio.on(UNSUBSCRIBE)
+    def on_unsubscribe():
+        # E.g. the page which displays `var` is closed, while the window stays open.
+        leave_room(ROOM)
+        unsubscribe(request.sid)  # type: ignore
+
+    def get_state(is_blob_mode: bool, needs_baseline: bool, fresh: bool = False) -> PushedState:
+        # The value is encoded once for all the sessions it is pushed to after a change.
+        nonlocal version
+        if not needs_baseline:
+            version += 1
+            return PushedState(version, change_version, is_blob_mode, py_data_to_sync_data(var.value, is_blob_mode))
+        state = latest_states.get(is_blob_mode)
+        if state is None or state.change_version != change_version:
+            state = None
+        elif fresh:
+            # Mutations nested in `var` are not always detected, so a value requested by a session is encoded again.
+            # It still shares the latest state if it turns out to be unchanged, so that later patches are shared too.
+            sync_data = py_data_to_sync_data(var.value, is_blob_mode)
+            if state.baseline is None or diff(state.baseline, sync_data):
+                version += 1
+                state = PushedState(version, change_version, is_blob_mode, sync_data)
+                latest_states[is_blob_mode] = state
+        if state is None:
+            version += 1
+            state = PushedState(version, change_version, is_blob_mode, py_data_to_sync_data(var.value, is_blob_mode))
+            latest_states[is_blob_mode] = state
+        if needs_baseline and state.baseline is None:
+            # The sync data shares unchanged lists and dicts with `var`, so the base of the next diff must be a copy.
+            state.baseline = copy_containers(state.sync_data)
+        return state
+
+    def set_sync_status_to_synced(session: VariableSession):
+        session.is_syncing = False
+        if session.pushed_change_version != change_version:
+            request_push()
 
     @socketio.on(JS_SYNCED_WITH_PY)
-    def set_sync_status_to_synced():
-        nonlocal is_syncing
-        is_syncing = False
-        if latest_pushed_py_value != to_raw(var.value):
-            push_py_to_js()
+    def on_js_synced_with_py():
+        session = sessions.get(request.sid)  # type: ignore
+        if session is None:
+            return
+        if session.push_time is not None:
+            metrics.round_trip_time.observe(perf_counter() - session.push_time)
+            session.push_time = None
+        set_sync_status_to_synced(session)
+
+    def emit_push(event: str, data: Dict[str, Any], group: List[VariableSession], state: PushedState):
+        push_time = perf_counter()
+        for session in group:
+            session.is_syncing = True
+            session.state = state
+            session.pushed_change_version = state.change_version
+            session.push_time = push_time
+        metrics.pushes += 1
+        # The message is encoded once, and sent to every session of the group.
+        to = ROOM if len(group) == len(sessions) else [session.sid for session in group]
+        with metering_emit(metrics):
+            socketio.emit(event, data, to=to)
+        if state.baseline is None:
+            # No session diffs against the value, so only its version is kept.
+            state.sync_data = None
+
+    def push_full_py_to_js(session: VariableSession):
+        state = get_state(session.is_blob_mode, session.is_patch_mode, fresh=True)
+        emit_push(PUSH_PY_TO_JS, {'data': state.sync_data, 'version': state.version}, [session], state)
 
-    @socketio.on(GET_PY_VALUE)
     def push_py_to_js():
-        nonlocal latest_pushed_py_value
-        if not is_syncing:
-            set_sync_status_to_syncing()
-            socketio.emit(PUSH_PY_TO_JS, {'data': py_data_to_sync_data(var.value)})
-            latest_pushed_py_value = to_raw(var.value)
+        groups: Dict[Tuple[bool, bool, int], List[VariableSession]] = {}
+        for session in sessions.values():
+            if session.is_syncing or session.pushed_change_version == change_version:
+                continue
+            # The sessions in patch mode which have received the same state are sent the same patch.
+            base = id(session.state) if session.is_patch_mode else 0
+            groups.setdefault((session.is_patch_mode, session.is_blob_mode, base), []).append(session)
+        for (is_patch_mode, is_blob_mode, _), group in groups.items():
+            state = get_state(is_blob_mode, is_patch_mode)
+            base_state = group[0].state
+            if not is_patch_mode or base_state is None or base_state.baseline is None:
+                emit_push(PUSH_PY_TO_JS, {'data': state.sync_data, 'version': state.version}, group, state)
+                continue
+            operations = diff(base_state.baseline, state.sync_data)
+            if not operations:
+                for session in group:
+                    session.pushed_change_version = change_version
+                continue
+            metrics.patches += 1
+            emit_push(PATCH_PY_TO_JS, {
+                'patch': operations,
+                'base_version': base_state.version,
+                'version': state.version
+            }, group, state)
+
+    @socketio.on(GET_PY_VALUE)
+    def get_py_value(options: Optional[Dict[str, Any]] = None):
+        session = subscribe()
+        if options is not None:
+            session.is_patch_mode = bool(options.get('patch', session.is_patch_mode))
+            session.is_blob_mode = bool(options.get('blob', session.is_blob_mode))
+        if session.is_patch_mode:
+            # In patch mode, the JS side requests the value again when its version mismatches, so a full resync
+            # must be pushed even if the previous push has not been acknowledged.
+            push_full_py_to_js(session)
+        elif not session.is_syncing:
+            push_full_py_to_js(session)
+
+    def receive_js_state(session: VariableSession, baseline: Any):
+        # The session already has the value it has sent, so it does not need to be pushed back.
+        nonlocal version
+        session.pushed_change_version = change_version
+        version += 1
+        state = PushedState(version, change_version, session.is_blob_mode, baseline)
+        state.baseline = baseline
+        session.state = state
 
     @socketio.on(PUSH_JS_TO_PY)
     def sync_py_with_js(res: 'dict[str, Any]'):
+        session = subscribe()
         if is_computed:
-            socketio.emit(PY_SYNCED_WITH_JS)
+            socketio.emit(PY_SYNCED_WITH_JS, {'version': session.version}, to=session.sid)
             return
         if 'data' not in res:
             raise RuntimeError('The data field is missing')
+        metrics.js_pushes += 1
         value = res['data']
-        set_sync_status_to_syncing()
-        var.value = sync_object_to_py_data(value)
-        set_sync_status_to_synced()
-        socketio.emit(PY_SYNCED_WITH_JS)
-
-    watch(var, push_py_to_js, deep=True)
+        # The other sessions are pushed the new value while it is set.
+        session.is_syncing = True
+        set_ref_value(var, sync_object_to_py_data(value))
+        if not session.is_patch_mode:
+            session.pushed_change_version = change_version
+            socketio.emit(PY_SYNCED_WITH_JS, to=session.sid)
+        else:
+            # `var` may share lists and dicts with `value`, so the base of the next diff must be a copy.
+            receive_js_state(session, copy_containers(value))
+            socketio.emit(PY_SYNCED_WITH_JS, {'version': session.version}, to=session.sid)
+        set_sync_status_to_synced(session)
+
+    @socketio.on(PATCH_JS_TO_PY)
+    def patch_py_with_js(res: 'dict[str, Any]'):
+        session = subscribe()
+        if is_computed:
+            socketio.emit(PY_SYNCED_WITH_JS, {'version': session.version}, to=session.sid)
+            return
+        if 'patch' not in res:
+            raise RuntimeError('The patch field is missing')
+        metrics.js_pushes += 1
+        base_state = session.state
+        if base_state is None or base_state.baseline is None or res.get('base_version') != base_state.version:
+            # The JS side has missed an update, so the patch cannot be applied. Resync the full value instead.
+            socketio.emit(PY_SYNCED_WITH_JS, {'version': session.version}, to=session.sid)
+            push_full_py_to_js(session)
+            return
+        operations = res['patch']
+        session.is_syncing = True
+        value = var.value
+        previous_change_version = change_version
+        new_value = apply_patch(value, operations, sync_object_to_py_data)
+        if new_value is not value:
+            set_ref_value(var, new_value)
+        if change_version == previous_change_version:
+            # Changes nested deeper than the top level of `var` are not detected by the watcher, but the other
+            # sessions must still be pushed the patched value.
+            on_change()
+            if snapshot is not None:
+                snapshot.notify()
+        baseline = base_state.baseline
+        # The base state may be shared with other sessions, which must not see the patch applied to it.
+        if base_state in latest_states.values() or any(
+                other is not session and other.state is base_state for other in sessions.values()):
+            baseline = copy_containers(baseline)
+        receive_js_state(session, apply_patch(baseline, operations, deepcopy))
+        socketio.emit(PY_SYNCED_WITH_JS, {'version': session.version}, to=session.sid)
+        set_sync_status_to_synced(session)
+
+    policy = get_sync_policy(var)
+    scheduler = None if policy is None else PushScheduler(policy, push_py_to_js)
+
+    def request_push():
+        if scheduler is None:
+            push_py_to_js()
+        else:
+            scheduler.notify()
+
+    def on_change():
+        nonlocal change_version
+        change_version += 1
+        request_push()
+
+    def watch_source() -> Any:
+        value = var.value
+        return ByIdentity(value) if is_array_like(value) else value
+
+
+class ListView:
+    '''The window of a `WindowedList` displayed by one renderer session, and what it has been pushed.'''
+
+    def __init__(self, sid: str, window: ListWindow, is_blob_mode: bool) -> None:
+        self.sid = sid
+        self.window = window
+        self.is_blob_mode = is_blob_mode
+        self.total = -1
+        self.indices: List[int] = []
+        self.rows: Any = None
+
+
+def register_windowed_list(name: str, items: WindowedList):
+    event_name = f'pylist_{name}'
+    GET_WINDOW = f'{event_name}__get_window'
+    PUSH_WINDOW = f'{event_name}__push_window'
+    UNSUBSCRIBE = f'{event_name}__unsubscribe'
+    views: Dict[str, ListView] = {}
+    pending_changes: List[ListChange] = []
+    is_flush_scheduled = False
+    metrics = get_variable_metrics(name)
+
+    def push_window(view: ListView, force: bool = False):
+        total = len(items)
+        indices, rows = items.get_window(view.window)
+        sync_rows = py_data_to_sync_data(rows, view.is_blob_mode)
+        message: Dict[str, Any] = {'offset': view.window.offset, 'total': total}
+        if force or indices != view.indices or sync_rows != view.rows:
+            message['indices'] = indices
+            message['rows'] = sync_rows
+            view.indices = indices
+            # The rows may be mutated in place later, so the copy is compared with the next window.
+            view.rows = copy_containers(sync_rows)
+        elif total == view.total:
+            return
+        view.total = total
+        metrics.pushes += 1
+        with metering_emit(metrics):
+            socketio.emit(PUSH_WINDOW, message, to=view.sid)
+
+    def flush():
+        nonlocal is_flush_scheduled
+        is_flush_scheduled = False
+        changes = pending_changes[:]
+        pending_changes.clear()
+        total = len(items)
+        for view in list(views.values()):
+            if view.total != total or any(view.window.is_affected_by(change) for change in changes):
+                push_window(view)
+
+    def on_change(change: ListChange):
+        # The changes made before the current greenlet yields, e.g. by a loop of appends, are pushed at once.
+        nonlocal is_flush_scheduled
+        pending_changes.append(change)
+        if not is_flush_scheduled:
+            is_flush_scheduled = True
+            socketio.start_background_task(flush)
+
+    def unsubscribe(sid: str):
+        if views.pop(sid, None) is not None and not views:
+            items.remove_listener(on_change)
+            pending_changes.clear()
+
+    session_cleanups.append(unsubscribe)
+
+    @socketio.on(GET_WINDOW)
+    def get_window(options: Optional[Dict[str, Any]] = None):
+        options = options or {}
+        sid = request.sid  # type: ignore
+        window = ListWindow(options.get('offset', 0), options.get('limit', 100), options.get('sortKey'),
+                            bool(options.get('descending', False)))
+        if not views:
+            items.add_listener(on_change)
+        view = views[sid] = ListView(sid, window, bool(options.get('blob', False)))
+        push_window(view, force=True)
+
+    @socketio.on(UNSUBSCRIBE)
+    def on_unsubscribe():
+        unsubscribe(request.sid)  # type: ignore
 
 
 if __name__ == '__main__':
@@ -214,6 +867,9 @@ if __name__ == '__main__':
                 var = val
                 register_reactive_var(var_name, var)
                 sys.stderr.write(f'Reactive Variable {var_name} is registered.\n')
+            elif isinstance(val, WindowedList):
+                register_windowed_list(key, val)
+                sys.stderr.write(f'Windowed List {key} is registered.\n')
             elif callable(val):  # Python Function
                 if isinstance(val, type):
                     continue
@@ -222,10 +878,13 @@ if __name__ == '__main__':
                 if func_name in reactivity_module.__dict__:
                     continue
                 rule = f'/api/{func_name}'
-                view_func = wrapper(func)
+                view_func = wrapper(func, func_name)
                 sys.stderr.write(f'Python Function {func_name} is registered.\n')
                 flask_app.add_url_rule(rule, func_name, view_func, methods=['POST'])
-    flask_app.add_url_rule('/api/info', 'info', wrapper(get_info), methods=['POST'])
+    flask_app.add_url_rule('/api/info', 'info', wrapper(get_info, 'info'), methods=['POST'])
+    flask_app.add_url_rule('/api/metrics', 'metrics', wrapper(get_metrics_info, 'metrics'), methods=['POST'])
+    if startup_profiler is not None:
+        startup_profiler.mark('reactive_variables_registered')
     # http_server = WSGIServer(('127.0.0.1', 19020), flask_app)
     # http_server.serve_forever()
     # Use socketio.run() instead of http_server.serve_forever() to enable
@@ -0,0 +1,101 @@
+import importlib.util
+import os
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, List, Optional
+
+from jianmu.log import logger
+
+lazy_imports = os.environ.get('JIANMU_LAZY_IMPORTS', '') not in ('', '0')
+'''
+Whether the modules in `src` are imported lazily, which is enabled by the `JIANMU_LAZY_IMPORTS` environment variable.
+A lazily imported module is only executed when one of its attributes is accessed for the first time.
+'''
+
+import_times: Dict[str, float] = {}
+'''Seconds spent importing each module in `src`, in import order. Lazily imported modules are added once loaded.'''
+
+
+def discover_src_modules() -> List[str]:
+    '''Names of the modules and packages in the `src` package, except `app`.'''
+    spec = importlib.util.find_spec('src')
+    if spec is None or not spec.submodule_search_locations:
+        return []
+    module_names: List[str] = []
+    for src_dir in spec.submodule_search_locations:
+        for entry in sorted(os.listdir(src_dir)):
+            path = Path(src_dir) / entry
+            if path.is_file() and entry.endswith('.py'):
+                module_name = entry[:-3]
+            elif path.is_dir() and (path / '__init__.py').is_file():
+                module_name = entry
+            else:
+                continue
+            if module_name.startswith('__') and module_name.endswith('__'):
+                continue
+            if module_name == 'app' or not module_name.isidentifier():
+                continue
+            module_names.append(module_name)
+    return module_names
+
+
+class LazyModule(ModuleType):
+    '''
+    A placeholder of a module in `src`, which imports the module when one of its attributes is accessed for the
+    first time, and delegates every attribute to it from then on.
+    '''
+
+    def __init__(self, name: str, full_name: str) -> None:
+        super().__init__(name)
+        spec = importlib.util.find_spec(full_name)
+        if spec is None:
+            raise ImportError(f'No module named {full_name!r}', name=full_name)
+        self.__spec__ = spec
+        self.__lazy_full_name__ = full_name
+        self.__lazy_module__: Optional[ModuleType] = None
+
+    def __load__(self) -> ModuleType:
+        module = self.__lazy_module__
+        if module is None:
+            full_name = self.__lazy_full_name__
+            module = timed_import(full_name)
+            self.__lazy_module__ = module
+            sys.modules[self.__name__] = module
+            del sys.modules[full_name]
+            logger.debug('Module %s is imported lazily in %.1f ms.', full_name, import_times[full_name] * 1000)
+        return module
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__load__(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith('__') and name.endswith('__'):
+            super().__setattr__(name, value)
+        else:
+            setattr(self.__load__(), name, value)
+
+
+def timed_import(name: str) -> ModuleType:
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    import_times[name] = time.perf_counter() - start
+    return module
+
+
+def import_src_modules() -> None:
+    '''
+    Import every module in `src` under its own name, so that `src/app.py` can import its siblings directly.
+    '''
+    for module_name in discover_src_modules():
+        full_name = f'src.{module_name}'
+        try:
+            if lazy_imports:
+                sys.modules[module_name] = LazyModule(module_name, full_name)
+                continue
+            module = timed_import(full_name)
+        except ImportError:
+            continue
+        sys.modules[module_name] = module
+        del sys.modules[full_name]
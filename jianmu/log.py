@@ -0,0 +1,16 @@
+import logging
+import os
+import sys
+
+logger = logging.getLogger('jianmu')
+'''
+Logger of the Jianmu backend. Its level is read from the `JIANMU_LOG_LEVEL` environment variable, `INFO` by default.
+Set it to `DEBUG` to log every call of the Python functions.
+'''
+
+if not logger.handlers:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(os.environ.get('JIANMU_LOG_LEVEL', 'INFO').upper())
+    logger.propagate = False
@@ -0,0 +1,124 @@
+import hashlib
+import time
+from collections import OrderedDict
+from functools import wraps
+from inspect import isasyncgen, iscoroutine, isgenerator
+from typing import Any, Callable, Hashable, List, NamedTuple, Optional, Sequence, Tuple, TypeVar, Union, cast
+
+from reactivity import Ref, is_ref, watch
+
+from .definitions import File
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+def file_digest(file: File) -> str:
+    digest = hashlib.sha256()
+    for chunk in file.iter_chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def freeze(obj: Any) -> Hashable:
+    '''Turn decoded JSON arguments into a hashable cache key. A `File` is identified by the hash of its content.'''
+    if isinstance(obj, File):
+        return ('File', obj.name, obj.type, file_digest(obj))
+    if isinstance(obj, dict):
+        return ('dict', tuple(sorted((key, freeze(value)) for key, value in obj.items())))
+    if isinstance(obj, (list, tuple)):
+        return ('list', tuple(freeze(item) for item in obj))
+    hash(obj)
+    return obj
+
+
+class MemoCache:
+    '''A LRU cache whose entries expire after `ttl` seconds.'''
+
+    def __init__(self, maxsize: Optional[int], ttl: Optional[float]) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: 'OrderedDict[Hashable, Tuple[Any, float]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self.entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            self.misses += 1
+            return False, None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = float('inf') if self.ttl is None else time.monotonic() + self.ttl
+        self.entries[key] = (value, expires_at)
+        self.entries.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.entries))
+
+
+def memoize(maxsize: Optional[int] = 128,
+            ttl: Optional[float] = None,
+            invalidate_on: Sequence[Union[str, Ref]] = ()) -> Callable[[F], F]:
+    '''
+    Cache the results of a Python function by its arguments.
+
+    Args:
+        maxsize: The maximum number of cached results, the least recently used one is evicted first. `None` means
+            unlimited.
+        ttl: Seconds after which a cached result expires. `None` means never.
+        invalidate_on: Reactive variables, or their names in the module of the function, whose changes clear the
+            cache.
+    '''
+
+    def decorator(func: F) -> F:
+        cache = MemoCache(maxsize, ttl)
+        watched_vars: List[Ref] = []
+
+        def watch_vars() -> None:
+            # Names are resolved on the first call, when the module of the function has been fully executed.
+            for var in invalidate_on:
+                if isinstance(var, str):
+                    var = func.__globals__[var]
+                if not is_ref(var):
+                    raise TypeError(f'{var!r} is not a reactive variable')
+                watch(var, cache.clear, deep=True)
+                watched_vars.append(var)
+
+        @wraps(func)
+        def wrapped(*args: Any, **kwargs: Any) -> Any:
+            if invalidate_on and not watched_vars:
+                watch_vars()
+            try:
+                key = freeze((args, kwargs))
+            except TypeError:
+                return func(*args, **kwargs)
+            found, value = cache.get(key)
+            if found:
+                return value
+            value = func(*args, **kwargs)
+            if not (isgenerator(value) or iscoroutine(value) or isasyncgen(value)):
+                cache.set(key, value)
+            return value
+
+        wrapped_any = cast(Any, wrapped)
+        wrapped_any.cache_info = cache.info
+        wrapped_any.cache_clear = cache.clear
+        return cast(F, wrapped)
+
+    return decorator
@@ -0,0 +1,153 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from .serializer import get_serializer
+
+
+class Histogram:
+    '''A latency histogram in seconds, with fixed buckets from 0.1 ms to 10 s.'''
+
+    BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self) -> None:
+        self.bucket_counts: List[int] = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.bucket_counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        '''The upper bound of the bucket holding the `q` quantile, or `max` if it is in the last bucket.'''
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.BOUNDS, self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {f'<={bound}': count for bound, count in zip(self.BOUNDS, self.bucket_counts)}
+        buckets['+Inf'] = self.bucket_counts[-1]
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': buckets,
+        }
+
+
+class FunctionMetrics:
+    '''Metrics of a Python function registered under `/api/<name>`.'''
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.cancellations = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.decode_time = Histogram()
+        self.execute_time = Histogram()
+        self.encode_time = Histogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'cancellations': self.cancellations,
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'decode_time': self.decode_time.to_dict(),
+            'execute_time': self.execute_time.to_dict(),
+            'encode_time': self.encode_time.to_dict(),
+        }
+
+
+class VariableMetrics:
+    '''Metrics of a registered reactive variable.'''
+
+    def __init__(self) -> None:
+        self.pushes = 0
+        self.patches = 0
+        self.bytes_pushed = 0
+        self.js_pushes = 0
+        self.subscribers = 0
+        self.round_trip_time = Histogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'pushes': self.pushes,
+            'patches': self.patches,
+            'bytes_pushed': self.bytes_pushed,
+            'js_pushes': self.js_pushes,
+            'subscribers': self.subscribers,
+            'round_trip_time': self.round_trip_time.to_dict(),
+        }
+
+
+function_metrics: Dict[str, FunctionMetrics] = {}
+
+variable_metrics: Dict[str, VariableMetrics] = {}
+
+emitting_variable: ContextVar[Optional[VariableMetrics]] = ContextVar('emitting_variable', default=None)
+
+
+def get_function_metrics(name: str) -> FunctionMetrics:
+    if name not in function_metrics:
+        function_metrics[name] = FunctionMetrics()
+    return function_metrics[name]
+
+
+def get_variable_metrics(name: str) -> VariableMetrics:
+    if name not in variable_metrics:
+        variable_metrics[name] = VariableMetrics()
+    return variable_metrics[name]
+
+
+@contextmanager
+def metering_emit(metrics: VariableMetrics) -> Iterator[None]:
+    '''Count the bytes of the Socket.IO payloads encoded in this context as pushed by a reactive variable.'''
+    token = emitting_variable.set(metrics)
+    try:
+        yield
+    finally:
+        emitting_variable.reset(token)
+
+
+class MeteredJSON:
+    '''
+    The JSON module used by Socket.IO. It encodes with the current serializer, and counts the size of every payload
+    encoded in `metering_emit` for free, instead of encoding the payload a second time.
+    '''
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs: Any) -> str:
+        encoded = get_serializer().dumps(obj, **kwargs)
+        metrics = emitting_variable.get()
+        if metrics is not None:
+            metrics.bytes_pushed += len(encoded)
+        return encoded
+
+    @staticmethod
+    def loads(data: Any, **kwargs: Any) -> Any:
+        return get_serializer().loads(data, **kwargs)
+
+
+def get_metrics() -> Dict[str, Any]:
+    return {
+        'functions': {name: metrics.to_dict() for name, metrics in function_metrics.items()},
+        'variables': {name: metrics.to_dict() for name, metrics in variable_metrics.items()},
+    }
@@ -0,0 +1,96 @@
+from typing import Any, Callable, List, Union
+
+from typing_extensions import NotRequired, TypedDict
+
+from jianmu.convert import is_sync_object
+from jianmu.exceptions import JianmuException
+
+PatchPath = List[Union[str, int]]
+'''Path of a patch operation, a list of dict keys and list indices from the root value.'''
+
+
+class PatchOperation(TypedDict):
+    op: str
+    '''One of `add`, `remove` and `replace`.'''
+    path: PatchPath
+    value: NotRequired[Any]
+
+
+def diff(old: Any, new: Any) -> List[PatchOperation]:
+    '''
+    Compute the patch operations which turn `old` into `new`.
+
+    Both values must be JSON-like data (dicts, lists and scalars). Applying the returned operations to `old` in order
+    with `apply_patch` produces a value equal to `new`. Sync objects, e.g. of a `File` or an array, are replaced as a
+    whole, since the renderer holds the decoded values rather than the sync objects.
+    '''
+    operations: List[PatchOperation] = []
+    _diff(old, new, [], operations)
+    return operations
+
+
+def _diff(old: Any, new: Any, path: PatchPath, operations: List[PatchOperation]) -> None:
+    if old is new:
+        return
+    if is_sync_object(old) or is_sync_object(new):
+        if old != new:
+            operations.append({'op': 'replace', 'path': path, 'value': new})
+    elif isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                operations.append({'op': 'remove', 'path': path + [key]})
+        for key, value in new.items():
+            if key in old:
+                _diff(old[key], value, path + [key], operations)
+            else:
+                operations.append({'op': 'add', 'path': path + [key], 'value': value})
+    elif isinstance(old, list) and isinstance(new, list):
+        list_operations: List[PatchOperation] = []
+        shared_len = min(len(old), len(new))
+        for index in range(shared_len):
+            _diff(old[index], new[index], path + [index], list_operations)
+        for index in range(shared_len, len(new)):
+            list_operations.append({'op': 'add', 'path': path + [index], 'value': new[index]})
+        # Remove from the tail so that every index stays valid while the operations are applied in order.
+        for index in range(len(old) - 1, shared_len - 1, -1):
+            list_operations.append({'op': 'remove', 'path': path + [index]})
+        # If most of the list has changed (e.g. an item is inserted at the head), replacing it is cheaper.
+        if len(list_operations) > max(1, len(new) // 2):
+            operations.append({'op': 'replace', 'path': path, 'value': new})
+        else:
+            operations.extend(list_operations)
+    elif type(old) is not type(new) or old != new:
+        operations.append({'op': 'replace', 'path': path, 'value': new})
+
+
+def apply_patch(target: Any, operations: List[PatchOperation], convert: Callable[[Any], Any] = lambda x: x) -> Any:
+    '''
+    Apply patch operations to `target` in place and return the patched value.
+
+    The returned value is `target` itself, unless an operation replaces the root value. Every `value` of the
+    operations is passed through `convert` before it is written into `target`.
+    '''
+    for operation in operations:
+        op = operation['op']
+        path = operation['path']
+        if not path:
+            if op != 'replace':
+                raise JianmuException(f'Cannot {op} the root value')
+            target = convert(operation['value'])
+            continue
+        parent = target
+        for key in path[:-1]:
+            parent = parent[key]
+        key = path[-1]
+        if op == 'add':
+            if isinstance(parent, list):
+                parent.insert(int(key), convert(operation['value']))
+            else:
+                parent[key] = convert(operation['value'])
+        elif op == 'replace':
+            parent[key] = convert(operation['value'])
+        elif op == 'remove':
+            del parent[key]
+        else:
+            raise JianmuException(f'Unknown patch operation: {op}')
+    return target
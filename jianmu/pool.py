@@ -0,0 +1,102 @@
+import contextvars
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import wraps
+from importlib import import_module
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar, cast
+
+from .sock import get_socketio
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+POOL_MODES = ('thread', 'process')
+
+pool_sizes: Dict[str, Optional[int]] = {mode: None for mode in POOL_MODES}
+'''Maximum number of workers of each pool, `None` means the default of `concurrent.futures`.'''
+
+executors: Dict[str, Executor] = {}
+
+
+def check_mode(mode: str) -> None:
+    if mode not in POOL_MODES:
+        raise ValueError(f'The pool mode must be one of {POOL_MODES}, but got {mode}')
+
+
+def set_pool_size(mode: str, size: Optional[int]) -> None:
+    '''Set the maximum number of workers of the `thread` or `process` pool. A running pool is replaced.'''
+    check_mode(mode)
+    pool_sizes[mode] = size
+    executor = executors.pop(mode, None)
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def get_executor(mode: str) -> Executor:
+    check_mode(mode)
+    if mode not in executors:
+        if mode == 'thread':
+            executors[mode] = ThreadPoolExecutor(max_workers=pool_sizes[mode])
+        else:
+            executors[mode] = ProcessPoolExecutor(max_workers=pool_sizes[mode])
+    return executors[mode]
+
+
+def run_blocking(func: Callable[..., Any], *args: Any) -> Any:
+    '''Call `func` in a native thread instead of the event loop, so that the other requests keep being served.'''
+    async_mode = get_socketio().async_mode
+    if async_mode.startswith('gevent'):
+        from gevent import get_hub
+
+        def call() -> Tuple[bool, Any]:
+            # The threadpool of gevent prints the errors raised in it, so they are passed back to be raised here.
+            try:
+                return True, func(*args)
+            except BaseException as e:
+                return False, e
+
+        succeeded, result = get_hub().threadpool.apply(call)
+        if not succeeded:
+            raise result
+        return result
+    if async_mode == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(func, *args)
+    return func(*args)
+
+
+def wait_for(future: Future) -> Any:
+    return run_blocking(future.result)
+
+
+def call_unwrapped(module_name: str, qualname: str, args: Any, kwargs: Any) -> Any:
+    # A decorated function cannot be pickled to a worker process, so it is looked up and unwrapped there.
+    func: Any = import_module(module_name)
+    for attr in qualname.split('.'):
+        func = getattr(func, attr)
+    func = getattr(func, '__wrapped__', func)
+    return func(*args, **kwargs)
+
+
+def run_in_pool(mode: str = 'thread') -> Callable[[F], F]:
+    '''
+    Run the decorated Python function in the `thread` or `process` pool instead of the event loop.
+
+    Use the `process` pool for CPU-bound functions, its functions must be defined at the top level of a module, and
+    their arguments and return values must be picklable.
+    '''
+    check_mode(mode)
+
+    def decorator(func: F) -> F:
+
+        @wraps(func)
+        def wrapped(*args: Any, **kwargs: Any) -> Any:
+            executor = get_executor(mode)
+            if mode == 'process':
+                future = executor.submit(call_unwrapped, func.__module__, func.__qualname__, args, kwargs)
+            else:
+                # The context holds the cancellation token of the call, see `get_cancellation_token`.
+                future = executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+            return wait_for(future)
+
+        return cast(F, wrapped)
+
+    return decorator
@@ -0,0 +1,93 @@
+import importlib.abc
+import json
+import sys
+import time
+from datetime import datetime
+from importlib.machinery import ModuleSpec
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Optional, Sequence
+
+
+class TimedLoader(importlib.abc.Loader):
+
+    def __init__(self, loader: Any, name: str, times: Dict[str, float]) -> None:
+        self.loader = loader
+        self.name = name
+        self.times = times
+
+    def create_module(self, spec: ModuleSpec) -> Optional[ModuleType]:
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.times[self.name] = time.perf_counter() - start
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.loader, name)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    '''Records the time spent executing every module imported while it is installed, including its own imports.'''
+
+    def __init__(self) -> None:
+        self.times: Dict[str, float] = {}
+
+    def find_spec(self,
+                  fullname: str,
+                  path: Optional[Sequence[str]],
+                  target: Optional[ModuleType] = None) -> Optional[ModuleSpec]:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = TimedLoader(spec.loader, fullname, self.times)
+        return spec
+
+
+class StartupProfiler:
+    '''
+    Collects where the boot time of the backend goes, and writes it as a JSON report. All the times are in seconds,
+    and the milestones are measured from `start_time`.
+    '''
+
+    def __init__(self, start_time: float) -> None:
+        self.start_time = start_time
+        self.milestones: Dict[str, float] = {}
+        self.import_timer = ImportTimer()
+
+    def mark(self, milestone: str) -> None:
+        self.milestones[milestone] = time.perf_counter() - self.start_time
+
+    def start_timing_imports(self) -> None:
+        sys.meta_path.insert(0, self.import_timer)
+
+    def stop_timing_imports(self) -> None:
+        if self.import_timer in sys.meta_path:
+            sys.meta_path.remove(self.import_timer)
+
+    def report(self) -> Dict[str, Any]:
+        # Imported here, as this module is loaded before the `jianmu` package to time its imports.
+        from jianmu.info import python_version, version
+        from jianmu.loader import import_times
+        return {
+            'jianmu_version': version,
+            'python_version': python_version,
+            'created_at': datetime.now().isoformat(),
+            'milestones': self.milestones,
+            'src_modules': dict(import_times),
+            'modules': dict(sorted(self.import_timer.times.items(), key=lambda item: item[1], reverse=True)),
+        }
+
+    def write(self, path: str) -> None:
+        report_path = Path(path)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(self.report(), indent=2), encoding='utf-8')
@@ -0,0 +1,46 @@
+from typing import Any, Callable, Dict
+
+RPC_TRANSPORTS = ('http', 'socket')
+
+rpc_options: Dict[str, Any] = {'transport': 'http', 'ordered': False}
+'''How the renderer calls Python functions, it reads these options from `/api/info`.'''
+
+
+def set_rpc_transport(transport: str, ordered: bool = False) -> None:
+    '''
+    Set how the renderer calls Python functions.
+
+    - `http`: One HTTP POST to `/api/<name>` per call.
+    - `socket`: One `RPC:call` message over the Socket.IO connection which is already open for reactive variables,
+      answered with an `RPC:result` message carrying the same id. Calls run concurrently. If `ordered` is true, the
+      results are sent in the order the calls are received, otherwise as soon as each call returns.
+    '''
+    if transport not in RPC_TRANSPORTS:
+        raise ValueError(f'The RPC transport must be one of {RPC_TRANSPORTS}, but got {transport}')
+    rpc_options['transport'] = transport
+    rpc_options['ordered'] = ordered
+
+
+class ResponseSequencer:
+    '''Emit the results of the calls of one session in the order the calls are received.'''
+
+    def __init__(self, emit: Callable[[Any], None]) -> None:
+        self.emit = emit
+        self.received = 0
+        self.emitted = 0
+        self.pending: Dict[int, Any] = {}
+
+    def reserve(self) -> int:
+        '''Reserve the position of a call which has just been received.'''
+        position = self.received
+        self.received += 1
+        return position
+
+    def resolve(self, position: int, result: Any) -> None:
+        self.pending[position] = result
+        while self.emitted in self.pending:
+            try:
+                self.emit(self.pending.pop(self.emitted))
+            finally:
+                # A result which fails to be emitted must not hold back the results after it.
+                self.emitted += 1
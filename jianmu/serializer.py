@@ -0,0 +1,87 @@
+import json
+from dataclasses import asdict, is_dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Union
+from uuid import UUID
+
+from reactivity import is_reactive, to_raw
+
+
+def default(obj: Any) -> Any:
+    '''Convert an object which is not natively supported by the serializer, one object at a time.'''
+    if is_reactive(obj):
+        return to_raw(obj)
+    if isinstance(obj, dict):
+        return dict(obj)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return list(obj)
+    if isinstance(obj, str):
+        return str(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    # NumPy arrays and scalars, without importing NumPy.
+    if hasattr(obj, 'dtype') and hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (Decimal, UUID)):
+        return str(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class Serializer:
+    '''Encodes and decodes the JSON payloads of the HTTP API and the Socket.IO connection.'''
+
+    name = 'json'
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return json.dumps(obj, default=default, separators=(',', ':'))
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return self.dumps(obj).encode('utf-8')
+
+    def loads(self, data: Union[str, bytes], **kwargs: Any) -> Any:
+        return json.loads(data)
+
+
+try:
+    import orjson
+
+    class OrjsonSerializer(Serializer):
+        '''
+        Serializes with orjson, which natively handles dataclasses, datetimes and NumPy arrays. Subclasses of the
+        builtin types, like the reactive containers, are converted by `default`.
+        '''
+
+        name = 'orjson'
+
+        OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS
+
+        def dumps(self, obj: Any, **kwargs: Any) -> str:
+            return self.dumps_bytes(obj).decode('utf-8')
+
+        def dumps_bytes(self, obj: Any) -> bytes:
+            try:
+                return orjson.dumps(obj, default=default, option=self.OPTIONS)
+            except TypeError:
+                # e.g. integers out of the 64-bit range, which the standard library supports.
+                return super().dumps(obj).encode('utf-8')
+
+        def loads(self, data: Union[str, bytes], **kwargs: Any) -> Any:
+            return orjson.loads(data)
+
+    serializer: Serializer = OrjsonSerializer()
+except ImportError:
+    serializer = Serializer()
+
+
+def get_serializer() -> Serializer:
+    return serializer
+
+
+def set_serializer(new_serializer: Serializer) -> None:
+    global serializer
+    serializer = new_serializer
@@ -0,0 +1,39 @@
+from typing import Any, Optional
+
+
+class PushedState:
+    '''
+    A value of a reactive variable as pushed to the renderer. It is shared by all the sessions which have received
+    this value, so that the value is encoded once, and the patches against it are computed once.
+
+    Only the sessions in patch mode need the value after it is pushed, as the base of the next patch, so the value is
+    dropped from the states pushed to the other sessions, which keep just the versions.
+    '''
+
+    def __init__(self, version: int, change_version: int, is_blob_mode: bool, sync_data: Any) -> None:
+        self.version = version
+        self.change_version = change_version
+        self.is_blob_mode = is_blob_mode
+        self.sync_data = sync_data
+        self.baseline: Any = None
+        '''A copy of `sync_data` as the base of the next diff, only made for sessions in patch mode.'''
+
+
+class VariableSession:
+    '''The sync state of a reactive variable with one renderer session, e.g. one window.'''
+
+    def __init__(self, sid: str) -> None:
+        self.sid = sid
+        self.is_syncing = False
+        # In patch mode, only the difference between the pushed state and the current one is emitted.
+        self.is_patch_mode = False
+        # In blob mode, the bytes of `File` objects are served by /__jianmu_api__/blob/<blobId> instead of data URIs.
+        self.is_blob_mode = False
+        self.state: Optional[PushedState] = None
+        self.pushed_change_version = -1
+        # When the latest push was emitted, until the session acknowledges it.
+        self.push_time: Optional[float] = None
+
+    @property
+    def version(self) -> int:
+        return 0 if self.state is None else self.state.version
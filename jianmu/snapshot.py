@@ -0,0 +1,210 @@
+import atexit
+import os
+import pickle
+import struct
+import weakref
+import zlib
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+from reactivity import Ref, ref, to_raw, watch
+
+from .convert import copy_containers
+from .log import logger
+from .patch import PatchOperation, apply_patch, diff
+from .sync_policy import PushScheduler, SyncPolicy
+from .typed_array import ByIdentity, is_array_like, mark_raw_array
+
+T = TypeVar('T')
+
+SNAPSHOT_DIRECTORY = Path.cwd() / '.jianmu' / 'snapshots'
+
+# A record is its kind, the length and the CRC-32 of its payload, and the pickled payload.
+RECORD_HEADER = struct.Struct('<cII')
+FULL_RECORD = b'F'
+PATCH_RECORD = b'P'
+
+
+class SnapshotLog:
+    '''
+    The saved values of one reactive variable, in an append-only file of binary records.
+
+    A full record holds a whole value, and a patch record holds the patch operations from the value before it to the
+    next one, so that a small change of a large value appends a small record instead of rewriting the file. Once the
+    patches outweigh the full record, the file is rewritten as a single full record.
+    '''
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.full_size = 0
+        self.patch_size = 0
+        # Records appended after a damaged one would never be read, so the next write rewrites the log.
+        self.is_damaged = False
+
+    def read(self) -> Tuple[bool, Any, Any]:
+        '''
+        Return whether a value is saved, the version it is saved with, and the value. A record cut off by a crash is
+        ignored, along with the records after it.
+        '''
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return False, None, None
+        found, version, value = False, None, None
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            kind, length, checksum = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) != length or zlib.crc32(payload) != checksum:
+                break
+            if kind == FULL_RECORD:
+                found = True
+                version, value = pickle.loads(payload)
+                self.full_size, self.patch_size = start + length - offset, 0
+            elif kind == PATCH_RECORD and found:
+                value = apply_patch(value, pickle.loads(payload))
+                self.patch_size += start + length - offset
+            offset = start + length
+        if offset < len(data):
+            logger.warning('The snapshot %s is truncated at byte %d.', self.path, offset)
+            self.is_damaged = True
+        return found, version, value
+
+    def write_full(self, version: Any, value: Any) -> None:
+        # Written beside the log and renamed over it, so that a crash leaves either the old or the new log.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f'{self.path.name}.tmp')
+        record = self._record(FULL_RECORD, (version, value))
+        with open(temp_path, 'wb') as f:
+            f.write(record)
+        os.replace(temp_path, self.path)
+        self.full_size, self.patch_size = len(record), 0
+        self.is_damaged = False
+
+    def write_patch(self, operations: List[PatchOperation]) -> None:
+        record = self._record(PATCH_RECORD, operations)
+        with open(self.path, 'ab') as f:
+            f.write(record)
+        self.patch_size += len(record)
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.is_damaged or self.patch_size > self.full_size
+
+    @staticmethod
+    def _record(kind: bytes, payload: Any) -> bytes:
+        data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        return RECORD_HEADER.pack(kind, len(data), zlib.crc32(data)) + data
+
+
+class Snapshot:
+    '''Saves the value of a reactive variable to its `SnapshotLog` when it changes, at most once per second.'''
+
+    def __init__(self, var: Ref, log: SnapshotLog, version: Any) -> None:
+        self.var = var
+        self.log = log
+        self.version = version
+        # A copy of the latest saved value, as the base of the next patch.
+        self.baseline: Any = None
+        self.is_dirty = False
+        self.scheduler = PushScheduler(SyncPolicy(max_rate=1), self.save)
+        self.stop_watching: Optional[Callable[[], None]] = None
+
+    def start(self) -> None:
+        '''Start saving the changes of the variable, called once the backend is running.'''
+        var = self.var
+
+        def watch_source() -> Any:
+            value = var.value
+            return ByIdentity(value) if is_array_like(value) else value
+
+        if self.stop_watching is None:
+            self.stop_watching = watch(watch_source, self.notify, deep=True)
+        if self.is_dirty:
+            self.scheduler.notify()
+
+    def notify(self, *args: Any) -> None:
+        '''Called on every change of the variable.'''
+        self.is_dirty = True
+        self.scheduler.notify()
+
+    def save(self) -> None:
+        if not self.is_dirty:
+            return
+        self.is_dirty = False
+        value = to_raw(self.var.value)
+        try:
+            self._save(value)
+        except Exception:
+            logger.exception('Failed to save the snapshot %s.', self.log.path)
+
+    def _save(self, value: Any) -> None:
+        if is_array_like(value):
+            # Arrays are not diffed, and are not copied as a baseline either.
+            self.log.write_full(self.version, value)
+            self.baseline = None
+            return
+        operations = None
+        if self.baseline is not None and not self.log.needs_compaction:
+            try:
+                operations = diff(self.baseline, value)
+            except (TypeError, ValueError):
+                # E.g. an array nested in the value, which cannot be compared with `!=`.
+                operations = None
+        if operations is None:
+            self.log.write_full(self.version, value)
+        elif operations:
+            self.log.write_patch(operations)
+        # The value may be mutated in place, so the base of the next patch must be a copy.
+        self.baseline = copy_containers(value)
+
+
+snapshots: 'weakref.WeakKeyDictionary[Ref, Snapshot]' = weakref.WeakKeyDictionary()
+
+
+def persisted_ref(key: str, factory: Callable[[], T], version: Any = None) -> Ref[T]:
+    '''
+    Create a reactive variable whose value is saved under `.jianmu/snapshots` whenever it changes, and restored from
+    there on the next start instead of calling `factory`, e.g. `table = persisted_ref('table', load_table)`.
+
+    `key` names the snapshot, and must be unique in the project. Change `version` to discard the saved value, e.g. when
+    the data that `factory` loads has changed. `jianmu clean` discards all the saved values.
+
+    The value is pickled, so it can hold anything picklable, including NumPy arrays and DataFrames. Only changes which
+    the reactive variable detects are saved, so assign a new array rather than changing one in place.
+    '''
+    if not key.replace('_', '').replace('-', '').isalnum():
+        raise ValueError(f'The snapshot key must be made of letters, digits, "_" and "-", but got {key}')
+    log = SnapshotLog(SNAPSHOT_DIRECTORY / f'{key}.snapshot')
+    found, saved_version, value = False, None, None
+    try:
+        found, saved_version, value = log.read()
+    except Exception:
+        logger.exception('Failed to restore the snapshot %s.', log.path)
+    if found and saved_version == version:
+        var = ref(value)
+        mark_raw_array(var)
+        snapshot = Snapshot(var, log, version)
+        if not is_array_like(value):
+            snapshot.baseline = copy_containers(value)
+        logger.debug('The snapshot %s is restored.', key)
+    else:
+        var = ref(factory())
+        mark_raw_array(var)
+        snapshot = Snapshot(var, log, version)
+        # The first value is saved as soon as the backend is running.
+        snapshot.is_dirty = True
+    snapshots[var] = snapshot
+    return var
+
+
+def get_snapshot(var: Ref) -> Optional[Snapshot]:
+    return snapshots.get(var)
+
+
+@atexit.register
+def save_snapshots() -> None:
+    '''Save the changes which are still waiting for their turn.'''
+    for snapshot in list(snapshots.values()):
+        snapshot.save()
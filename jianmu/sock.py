@@ -3,6 +3,8 @@ from typing import Optional
 from flask import Flask
 from flask_socketio import SocketIO
 
+from .metrics import MeteredJSON
+
 socketio: Optional[SocketIO] = None
 
 
@@ -10,7 +12,7 @@ def init_socketio(app: Flask) -> None:
     global socketio
     if socketio is not None:
         raise ValueError('SocketIO is already initialized.')
-    socketio = SocketIO(app, cors_allowed_origins='*')
+    socketio = SocketIO(app, cors_allowed_origins='*', json=MeteredJSON)
 
 
 def get_socketio() -> SocketIO:
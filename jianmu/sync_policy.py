@@ -0,0 +1,99 @@
+import time
+import weakref
+from typing import Callable, Optional, TypeVar
+
+from reactivity import Ref
+
+from .sock import get_socketio
+
+T = TypeVar('T')
+
+
+class SyncPolicy:
+    '''
+    How the pushes of a reactive variable to the renderer are coalesced. The latest value is always the one pushed.
+
+    - `max_rate`: At most this many pushes per second.
+    - `debounce`: Push only after the value has not changed for this many seconds.
+    - `frame_rate`: Batch all the changes in a frame and push them at the end of the frame, like
+      `requestAnimationFrame` with this many frames per second.
+    '''
+
+    def __init__(self,
+                 max_rate: Optional[float] = None,
+                 debounce: Optional[float] = None,
+                 frame_rate: Optional[float] = None) -> None:
+        for name, value in (('max_rate', max_rate), ('debounce', debounce), ('frame_rate', frame_rate)):
+            if value is not None and value <= 0:
+                raise ValueError(f'{name} must be positive, but got {value}')
+        self.max_rate = max_rate
+        self.debounce = debounce
+        self.frame_rate = frame_rate
+
+
+sync_policies: 'weakref.WeakKeyDictionary[Ref, SyncPolicy]' = weakref.WeakKeyDictionary()
+
+
+def sync_policy(var: Ref[T],
+                max_rate: Optional[float] = None,
+                debounce: Optional[float] = None,
+                frame_rate: Optional[float] = None) -> Ref[T]:
+    '''
+    Coalesce the pushes of the reactive variable `var` to the renderer, see `SyncPolicy`. Returns `var` itself, so that
+    it can wrap the definition of the variable, e.g. `progress = sync_policy(ref(0), max_rate=30)`.
+    '''
+    sync_policies[var] = SyncPolicy(max_rate, debounce, frame_rate)
+    return var
+
+
+def get_sync_policy(var: Ref) -> Optional[SyncPolicy]:
+    return sync_policies.get(var)
+
+
+class PushScheduler:
+    '''Delays the pushes of a reactive variable according to its `SyncPolicy`.'''
+
+    def __init__(self, policy: SyncPolicy, push: Callable[[], None]) -> None:
+        self.policy = policy
+        self.push = push
+        self.is_scheduled = False
+        self.first_change_time = 0.0
+        self.last_change_time = 0.0
+        self.last_push_time = float('-inf')
+
+    def deadline(self) -> float:
+        policy = self.policy
+        deadline = self.first_change_time
+        if policy.max_rate is not None:
+            deadline = max(deadline, self.last_push_time + 1 / policy.max_rate)
+        if policy.debounce is not None:
+            deadline = max(deadline, self.last_change_time + policy.debounce)
+        if policy.frame_rate is not None:
+            deadline = max(deadline, self.first_change_time + 1 / policy.frame_rate)
+        return deadline
+
+    def notify(self) -> None:
+        '''Called on every change of the variable.'''
+        now = time.monotonic()
+        self.last_change_time = now
+        if self.is_scheduled:
+            return
+        self.first_change_time = now
+        if self.deadline() <= now:
+            self.flush()
+            return
+        self.is_scheduled = True
+        get_socketio().start_background_task(self.wait_and_flush)
+
+    def wait_and_flush(self) -> None:
+        socketio = get_socketio()
+        delay = self.deadline() - time.monotonic()
+        while delay > 0:
+            socketio.sleep(delay)
+            delay = self.deadline() - time.monotonic()
+        self.is_scheduled = False
+        self.flush()
+
+    def flush(self) -> None:
+        self.last_push_time = time.monotonic()
+        self.push()
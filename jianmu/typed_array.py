@@ -0,0 +1,139 @@
+import sys
+from typing import Any, Dict, List
+
+from reactivity import Ref, mark_raw, ref
+
+from .exceptions import JianmuException
+
+try:
+    from reactivity.ref import trigger_ref_value
+except ImportError:
+    trigger_ref_value = None
+
+# The kinds of NumPy dtypes which have a JavaScript TypedArray counterpart: bool, int, uint and float.
+TYPED_ARRAY_KINDS = 'biuf'
+
+
+def is_ndarray(obj: Any) -> bool:
+    # NumPy is an optional dependency, if it has not been imported, `obj` cannot be an array.
+    numpy = sys.modules.get('numpy')
+    return numpy is not None and isinstance(obj, numpy.ndarray)
+
+
+def is_dataframe(obj: Any) -> bool:
+    pandas = sys.modules.get('pandas')
+    return pandas is not None and isinstance(obj, pandas.DataFrame)
+
+
+def is_array_like(obj: Any) -> bool:
+    return is_ndarray(obj) or is_dataframe(obj)
+
+
+# pyreactivity has no public API to read or write the value of a ref without comparing it with `==`, so the private
+# attribute of `RefImpl` is used, only through `get_raw_ref_value` and `set_raw_ref_value`. The pinned version of
+# pyreactivity is checked at import, so that an incompatible one fails loudly instead of silently.
+REF_VALUE_ATTRIBUTE = '_RefImpl__value'
+
+
+def check_ref_internals() -> None:
+    probe = ref(0)
+    if trigger_ref_value is None or getattr(probe, REF_VALUE_ATTRIBUTE, None) != 0:
+        raise JianmuException('The installed version of pyreactivity is not supported, please install the one '
+                              'required by jianmu')
+
+
+check_ref_internals()
+
+
+def get_raw_ref_value(var: Ref[Any]) -> Any:
+    '''Return the value held by `var` without making it reactive, `None` if `var` is e.g. a computed ref.'''
+    return getattr(var, REF_VALUE_ATTRIBUTE, None)
+
+
+def set_raw_ref_value(var: Ref[Any], value: Any) -> None:
+    '''Set the value held by `var` without comparing it with the old one, and trigger the watchers of `var`.'''
+    setattr(var, REF_VALUE_ATTRIBUTE, value)
+    trigger_ref_value(var)  # type: ignore
+
+
+def mark_raw_array(var: Ref[Any]) -> None:
+    '''Keep the array or DataFrame held by `var` from being made reactive, which these types do not support.'''
+    value = get_raw_ref_value(var)
+    if is_array_like(value):
+        mark_raw(value)
+
+
+def set_ref_value(var: Ref[Any], value: Any) -> None:
+    '''
+    Set `var.value` to `value`, where either of them may be an array or a DataFrame.
+
+    `Ref.value` skips the assignment if the new value equals the old one, and comparing arrays with `==` is
+    element-wise, so arrays are compared by identity here instead.
+    '''
+    old_value = get_raw_ref_value(var)
+    if not is_array_like(value) and not is_array_like(old_value):
+        var.value = value
+        return
+    if value is old_value:
+        return
+    set_raw_ref_value(var, mark_raw(value) if is_array_like(value) else value)
+
+
+class ByIdentity:
+    '''
+    Wrap an array or a DataFrame so that it is compared by identity. Comparing arrays with `==` is element-wise, so
+    watchers wrap them to tell whether the value has been replaced.
+    '''
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ByIdentity) and other.value is self.value
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = None  # type: ignore
+
+
+def ndarray_to_typed_array_data(array: Any) -> Dict[str, Any]:
+    '''
+    Encode a numeric array as its raw little-endian buffer, which is sent as a binary attachment by Socket.IO. Other
+    arrays are encoded as nested lists under `values`.
+    '''
+    import numpy
+    if array.dtype.kind not in TYPED_ARRAY_KINDS:
+        return {'dtype': 'object', 'shape': list(array.shape), 'values': array.tolist()}
+    dtype = array.dtype.newbyteorder('<')
+    array = numpy.ascontiguousarray(array, dtype=dtype)
+    return {'dtype': dtype.str, 'shape': list(array.shape), 'buffer': array.tobytes()}
+
+
+def typed_array_data_to_ndarray(data: Dict[str, Any]) -> Any:
+    '''Rebuild an array on top of the received buffer without copying it, so the array is read-only.'''
+    import numpy
+    if 'buffer' not in data:
+        return numpy.array(data['values'], dtype=object).reshape(data['shape'])
+    return numpy.frombuffer(data['buffer'], dtype=numpy.dtype(data['dtype'])).reshape(data['shape'])
+
+
+def dataframe_to_table_data(dataframe: Any) -> Dict[str, Any]:
+    columns: List[Dict[str, Any]] = []
+    for name in dataframe.columns:
+        column = ndarray_to_typed_array_data(dataframe[name].to_numpy())
+        column['name'] = str(name)
+        columns.append(column)
+    return {
+        'rowCount': len(dataframe),
+        'index': ndarray_to_typed_array_data(dataframe.index.to_numpy()),
+        'columns': columns,
+    }
+
+
+def table_data_to_dataframe(data: Dict[str, Any]) -> Any:
+    import pandas
+    return pandas.DataFrame(
+        {column['name']: typed_array_data_to_ndarray(column) for column in data['columns']},
+        index=typed_array_data_to_ndarray(data['index']) if 'index' in data else None,
+    )
@@ -0,0 +1,125 @@
+import os
+import time
+import weakref
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional
+from uuid import uuid4
+
+from jianmu.definitions import LazyFile
+from jianmu.exceptions import JianmuException
+
+CHUNK_SIZE = 1024 * 1024
+
+UPLOAD_TTL = 60 * 60
+'''Seconds after their last use that uploads which are never released are removed.'''
+
+
+class UploadStore:
+    '''
+    Files uploaded by the renderer in chunks, spooled to disk under `.jianmu/uploads` instead of being held in memory.
+
+    An upload is resumable: when a chunk fails, the renderer asks for the received size and continues from there.
+    Once all the bytes are received, the upload is turned into a `LazyFile`, and the renderer may pass the same upload
+    id again, e.g. to another call. The spool file is kept until the renderer releases the upload, or until it has not
+    been used for `ttl` seconds, but never while a `LazyFile` of it is alive.
+    '''
+
+    def __init__(self, directory: Path, ttl: float = UPLOAD_TTL) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self._files: 'weakref.WeakValueDictionary[str, LazyFile]' = weakref.WeakValueDictionary()
+
+    def _path(self, upload_id: str) -> Path:
+        # Upload ids are hex strings, anything else could point outside of the spool directory.
+        if not upload_id.isalnum():
+            raise JianmuException(f'Invalid upload id: {upload_id}')
+        return self.directory / upload_id
+
+    def create(self) -> str:
+        self.expire()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        upload_id = uuid4().hex
+        self._path(upload_id).touch()
+        return upload_id
+
+    def get_offset(self, upload_id: str) -> int:
+        '''Return the number of bytes received so far.'''
+        path = self._path(upload_id)
+        if not path.is_file():
+            raise JianmuException(f'Unknown upload id: {upload_id}')
+        return path.stat().st_size
+
+    def append(self, upload_id: str, offset: int, stream: BinaryIO) -> int:
+        '''
+        Append the chunk read from `stream` at `offset`, and return the number of bytes received so far.
+
+        `offset` must be the number of bytes received so far, so that a chunk which is sent again after a failure is
+        not appended twice.
+        '''
+        received = self.get_offset(upload_id)
+        if offset != received:
+            raise JianmuException(f'The offset of upload {upload_id} is {received}, but got {offset}')
+        with open(self._path(upload_id), 'ab') as f:
+            chunk = stream.read(CHUNK_SIZE)
+            while chunk:
+                f.write(chunk)
+                chunk = stream.read(CHUNK_SIZE)
+            return f.tell()
+
+    def get_path(self, upload_id: str) -> Optional[Path]:
+        '''Return the path of the spool file of an upload, `None` if there is none.'''
+        if not upload_id.isalnum():
+            return None
+        path = self._path(upload_id)
+        return path if path.is_file() else None
+
+    def get_file(self, upload_id: str, file_data: Dict) -> LazyFile:
+        '''Turn a finished upload into a `LazyFile` with the metadata in `file_data`.'''
+        path = self._path(upload_id)
+        file = self._files.get(upload_id)
+        if file is not None:
+            os.utime(path)
+            return file
+        received = self.get_offset(upload_id)
+        if received != file_data['size']:
+            raise JianmuException(f'Upload {upload_id} is incomplete, {received} of {file_data["size"]} bytes received')
+        # The modification time of the spool file is its last use.
+        os.utime(path)
+        file = LazyFile(
+            lastModified=file_data['lastModified'],
+            name=file_data['name'],
+            path=str(path),
+            size=file_data['size'],
+            type=file_data['type'],
+            webkitRelativePath=file_data['webkitRelativePath'],
+        )
+        self._files[upload_id] = file
+        return file
+
+    def release(self, upload_id: str) -> None:
+        '''Remove the spool file of an upload, once no `LazyFile` of it is alive.'''
+        path = str(self._path(upload_id))
+        file = self._files.get(upload_id)
+        if file is None:
+            _remove(path)
+        else:
+            weakref.finalize(file, _remove, path)
+
+    def expire(self) -> None:
+        '''Remove the spool files which have not been used for `ttl` seconds, including the ones of earlier runs.'''
+        if not self.directory.is_dir():
+            return
+        expiry_time = time.time() - self.ttl
+        for entry in os.scandir(self.directory):
+            if entry.name not in self._files and entry.stat().st_mtime < expiry_time:
+                _remove(entry.path)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+upload_store = UploadStore(Path.cwd() / '.jianmu' / 'uploads')
@@ -0,0 +1,183 @@
+from collections.abc import Mapping, MutableSequence
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union, overload
+
+MAX_WINDOW_SIZE = 10000
+'''The most rows the renderer can request at once.'''
+
+
+class ListChange(NamedTuple):
+    '''The rows in `[start, stop)` have changed. If `shift` is true, the rows after `start` have moved as well.'''
+    start: int
+    stop: int
+    shift: bool
+
+
+class ListWindow:
+    '''The range of a `WindowedList` displayed by one renderer session, e.g. the visible rows of a virtualized table.'''
+
+    def __init__(self, offset: int = 0, limit: int = 100, sort_key: Optional[str] = None,
+                 descending: bool = False) -> None:
+        self.offset = max(0, int(offset))
+        self.limit = min(max(0, int(limit)), MAX_WINDOW_SIZE)
+        self.sort_key = sort_key
+        self.descending = descending
+
+    def is_affected_by(self, change: ListChange) -> bool:
+        if self.sort_key is not None:
+            # Any changed row may be sorted into the window.
+            return True
+        if change.start >= self.offset + self.limit:
+            return False
+        return change.shift or change.stop > self.offset
+
+
+def _sort_value(row: Any, key: str) -> Any:
+    return row.get(key) if isinstance(row, Mapping) else getattr(row, key, None)
+
+
+def _mixed_sort_key(value: Any) -> Tuple[str, Any]:
+    # Values of different types are grouped by type, with all the numbers in one group.
+    return ('' if isinstance(value, (int, float)) else type(value).__name__, value)
+
+
+def _sort_indices(values: List[Any], indices: List[int], descending: bool) -> List[int]:
+    try:
+        return sorted(indices, key=values.__getitem__, reverse=descending)
+    except TypeError:
+        pass
+    # E.g. ids which are both numbers and strings.
+    try:
+        return sorted(indices, key=lambda i: _mixed_sort_key(values[i]), reverse=descending)
+    except TypeError:
+        # Values which are not ordered even within their type, e.g. dicts.
+        return sorted(indices, key=lambda i: (type(values[i]).__name__, repr(values[i])), reverse=descending)
+
+
+class WindowedList(MutableSequence):
+    '''
+    A large list which stays on the Python side. Unlike a reactive variable, it is never pushed to the renderer as a
+    whole: the renderer requests the range of rows it displays, optionally sorted by a key of the rows, and is pushed
+    only the changes which affect that range.
+
+    It is changed through the methods of `list`. A row mutated in place, e.g. `rows[0]['name'] = 'a'`, is not
+    detected, call `refresh(0)` after it, or assign the row again. A sorted order is computed once, and again only
+    after a change, so batch the changes of a list which is displayed sorted, e.g. with `extend`.
+    '''
+
+    def __init__(self, items: Iterable[Any] = ()) -> None:
+        self._items = list(items)
+        # The sorted orders of the rows requested by the renderer, as lists of indices, dropped on every change.
+        self._orders: Dict[Tuple[str, bool], List[int]] = {}
+        self._listeners: List[Callable[[ListChange], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @overload
+    def __getitem__(self, index: int) -> Any:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Any]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        return self._items[index]
+
+    def __setitem__(self, index: Union[int, slice], value: Any) -> None:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self._items))
+            size = len(self._items)
+            self._items[index] = value
+            if step == 1 and len(self._items) == size:
+                self._notify(ListChange(start, max(start, stop), False))
+            else:
+                self._notify(ListChange(min(start, stop), len(self._items), True))
+        else:
+            index = self._normalize(index)
+            self._items[index] = value
+            self._notify(ListChange(index, index + 1, False))
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(len(self._items))
+            del self._items[index]
+            start = min(start, stop)
+        else:
+            start = self._normalize(index)
+            del self._items[start]
+        self._notify(ListChange(start, len(self._items), True))
+
+    def __repr__(self) -> str:
+        return f'WindowedList({len(self._items)} rows)'
+
+    def insert(self, index: int, value: Any) -> None:
+        size = len(self._items)
+        start = min(index, size) if index >= 0 else max(0, size + index)
+        self._items.insert(index, value)
+        self._notify(ListChange(start, len(self._items), True))
+
+    def append(self, value: Any) -> None:
+        self._items.append(value)
+        self._notify(ListChange(len(self._items) - 1, len(self._items), True))
+
+    def extend(self, values: Iterable[Any]) -> None:
+        # One change for all the rows, instead of one per row as `MutableSequence.extend` would.
+        start = len(self._items)
+        self._items.extend(values)
+        if len(self._items) > start:
+            self._notify(ListChange(start, len(self._items), True))
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._notify(ListChange(0, 0, True))
+
+    def sort(self, *, key: Optional[Callable[[Any], Any]] = None, reverse: bool = False) -> None:
+        self._items.sort(key=key, reverse=reverse)  # type: ignore
+        self.refresh()
+
+    def reverse(self) -> None:
+        self._items.reverse()
+        self.refresh()
+
+    def refresh(self, start: int = 0, stop: Optional[int] = None) -> None:
+        '''Tell the renderer that the rows in `[start, stop)` have been mutated in place.'''
+        stop = len(self._items) if stop is None else stop
+        self._notify(ListChange(start, stop, False))
+
+    def get_window(self, window: ListWindow) -> Tuple[List[int], List[Any]]:
+        '''Return the indices and the rows in `window`.'''
+        stop = window.offset + window.limit
+        if window.sort_key is None:
+            indices = list(range(window.offset, min(stop, len(self._items))))
+        else:
+            indices = self._order(window.sort_key, window.descending)[window.offset:stop]
+        return indices, [self._items[i] for i in indices]
+
+    def add_listener(self, listener: Callable[[ListChange], None]) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[ListChange], None]) -> None:
+        self._listeners.remove(listener)
+
+    def _order(self, key: str, descending: bool) -> List[int]:
+        order = self._orders.get((key, descending))
+        if order is None:
+            values = [_sort_value(row, key) for row in self._items]
+            order = _sort_indices(values, [i for i, value in enumerate(values) if value is not None], descending)
+            # Rows without the key are sorted last in both directions, instead of failing to compare with None.
+            order.extend(i for i, value in enumerate(values) if value is None)
+            self._orders[(key, descending)] = order
+        return order
+
+    def _normalize(self, index: int) -> int:
+        if index < 0:
+            index += len(self._items)
+        if not 0 <= index < len(self._items):
+            raise IndexError('WindowedList index out of range')
+        return index
+
+    def _notify(self, change: ListChange) -> None:
+        self._orders.clear()
+        for listener in self._listeners:
+            listener(change)
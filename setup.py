@@ -32,7 +32,7 @@ setup(
         'Programming Language :: Python :: 3.10',
         'Programming Language :: Python :: 3.11',
     ],
-    install_requires=['dataclasses', 'Flask', 'flask-socketio', 'gevent', 'gevent-websocket', 'requests', 'rich', 'pyreactivity', 'typing_extensions'],
+    install_requires=['dataclasses', 'Flask', 'flask-socketio', 'gevent', 'gevent-websocket', 'requests', 'rich', 'pyreactivity==0.0.6', 'typing_extensions'],
     packages=setuptools.find_packages(include=['jianmu', 'jianmu.*']),
     entry_points={
         'console_scripts': ['jianmu=jianmu.cli:parse'],